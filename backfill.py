@@ -0,0 +1,138 @@
+# Ultralytics 🚀 AGPL-3.0 License - https://ultralytics.com/license
+"""
+Backfill metrics history from the data/*.json versions committed to this repository's git log.
+
+One `git log --raw` lists every changed data blob and a single `git cat-file --batch` pipe streams their contents,
+which are parsed in parallel into tidy (source, entity, metric, timestamp, date, value) rows.
+
+Usage:
+    $ python backfill.py                             # append to cache/history.db
+    $ python backfill.py --csv history.csv --db ''   # write a tidy CSV only
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import subprocess
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from history import HISTORY_DB, HistoryStore, flatten
+
+BASE_DIR = Path(__file__).parent
+COLUMNS = ("source", "entity", "metric", "timestamp", "date", "value")
+
+
+def history_sources() -> set[str]:
+    """Return the data/*.json stems holding source metrics: every fetch_stats.py source output plus the summary.
+
+    Other data files such as request metrics or Platform partials are bookkeeping, not history.
+    """
+    from fetch_stats import SOURCES  # imported here, it loads every fetcher
+
+    return {Path(output).stem for _, output, _ in SOURCES.values()} | {"summary"}
+
+
+def list_data_blobs(
+    repo: Path = BASE_DIR, path: str = "data", sources: set[str] | None = None
+) -> list[tuple[str, str, str]]:
+    """Return (commit_time, source, blob_sha) for every added or modified data/*.json blob, oldest first.
+
+    Only files whose stem is in `sources` are listed, defaulting to `history_sources()`.
+    """
+    sources = history_sources() if sources is None else sources
+    cmd = ["git", "-C", str(repo), "log", "--reverse", "--raw", "--no-abbrev", "--no-renames", "--format=@%cI"]
+    log = subprocess.run([*cmd, "--", path], capture_output=True, text=True, check=True).stdout
+    blobs, commit_time = [], None
+    for line in log.splitlines():
+        if line.startswith("@"):
+            commit_time = line[1:]
+        elif line.startswith(":"):
+            meta, file = line.split("\t", 1)
+            _, _, _, blob, status = meta.split()
+            if status != "D" and file.endswith(".json") and Path(file).stem in sources:
+                blobs.append((commit_time, Path(file).stem, blob))
+    return blobs
+
+
+def iter_blob_contents(shas: list[str], repo: Path = BASE_DIR):
+    """Yield (sha, bytes) for each blob through one `git cat-file --batch` process, skipping missing objects."""
+    proc = subprocess.Popen(
+        ["git", "-C", str(repo), "cat-file", "--batch"], stdin=subprocess.PIPE, stdout=subprocess.PIPE
+    )
+
+    def feed():
+        """Write all object names on a separate thread so a full stdout pipe cannot deadlock the reader."""
+        proc.stdin.write("".join(f"{sha}\n" for sha in shas).encode())
+        proc.stdin.close()
+
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+    for _ in shas:
+        header = proc.stdout.readline().split()
+        if len(header) < 3:  # '<sha> missing'
+            continue
+        content = proc.stdout.read(int(header[2]))
+        proc.stdout.read(1)  # trailing newline
+        yield header[0].decode(), content
+    writer.join()
+    proc.wait()
+
+
+def parse_blob(args: tuple[str, str, bytes]) -> list[tuple]:
+    """Parse one data JSON blob into tidy rows, timestamped by its payload or else by its commit time."""
+    source, commit_time, content = args
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return []
+    if not isinstance(data, dict):
+        return []
+    timestamp = data.get("timestamp") or commit_time
+    return [(source, e, m, timestamp, timestamp[:10], v) for e, m, v in flatten(source, data)]
+
+
+def backfill(repo: Path = BASE_DIR, workers: int | None = None) -> list[tuple]:
+    """Extract tidy metric rows from every historical version of the data/*.json files in `repo`."""
+    blobs = list_data_blobs(repo)
+    first_seen = {}
+    for commit_time, source, sha in blobs:
+        first_seen.setdefault(sha, (source, commit_time))  # identical content is parsed once
+    contents = ((*first_seen[sha], content) for sha, content in iter_blob_contents(list(first_seen), repo))
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk in pool.map(parse_blob, contents, chunksize=64):
+            rows.extend(chunk)
+    return rows
+
+
+def parse_opt(argv: list[str] | None = None):
+    """Parse command-line options for the backfill outputs from `argv` (default: sys.argv)."""
+    parser = argparse.ArgumentParser(description="Backfill metrics history from git")
+    parser.add_argument("--repo", type=str, default=str(BASE_DIR), help="Git repository to read")
+    parser.add_argument("--db", type=str, default=str(HISTORY_DB), help="History database to append to, '' to skip")
+    parser.add_argument("--csv", type=str, default="", help="Optional tidy CSV output path")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count)")
+    return parser.parse_args(argv)
+
+
+def main(opt) -> int:
+    """Backfill history rows into the database and/or CSV selected by `opt` and return the number of new rows."""
+    t = time.time()
+    rows = backfill(Path(opt.repo), opt.workers)
+    if opt.csv:
+        with open(opt.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            writer.writerows(rows)
+    added = HistoryStore(opt.db).extend(rows) if opt.db else 0
+    print(f"✅ Backfill: {len(rows):,} rows extracted, {added:,} new in history, done in {time.time() - t:.1f}s")
+    return added
+
+
+if __name__ == "__main__":
+    main(parse_opt())
@@ -0,0 +1,486 @@
+# Ultralytics 🚀 AGPL-3.0 License - https://ultralytics.com/license
+"""
+Offline benchmark of every fetcher against a local replay server.
+
+All HTTP traffic is redirected through `utils.REPLAY_URL` to a ThreadingHTTPServer stand-in that serves deterministic
+fixtures shaped like the GitHub GraphQL/REST, pypistats.org, pepy.tech, shields.io and portal API responses, with
+configurable latency, injected 429/5xx errors and GitHub-style rate-limit headers. The stand-in runs in a child process
+so its CPU and memory stay out of the measurements. Each source reports wall time, request count, response bytes,
+throttled time and peak traced memory, and can be compared against a saved baseline.
+
+Usage:
+    $ python benchmark.py                                          # all sources, 20 ms latency, no errors
+    $ python benchmark.py --sources github pypi --errors 0.05      # 5% injected 429/5xx responses
+    $ python benchmark.py --save bench.json                        # record a baseline
+    $ python benchmark.py --baseline bench.json --threshold 1.25   # exit 1 if any metric regresses by >25%
+
+Every run also checks the cold import time of each entry point against `IMPORT_BUDGETS_MS`, failing if a heavy
+dependency such as pandas slips back into module scope.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import zlib
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+from urllib.request import urlopen
+
+import count_stars
+import utils
+from fetch_stats import (
+    PYPI_PACKAGES,
+    fetch_github_stats,
+    fetch_platform_stats,
+    fetch_pypi_stats,
+    fetch_reddit_stats,
+)
+from utils import LIMITER, TokenPool
+
+# Metrics compared against a baseline, with the absolute slack below which differences are ignored as noise
+METRICS = {"wall_s": 0.05, "requests": 0, "bytes": 1024, "peak_mb": 0.5}
+
+# Cold import budgets in ms, not counting `requests`, which every HTTP code path needs
+IMPORT_BUDGETS_MS = {"stars": 25, "history": 25, "backfill": 100, "utils": 80, "fetch_stats": 100, "count_stars": 100}
+
+
+class Fixtures:
+    """Deterministic synthetic payloads for the APIs the fetchers call, sized per entity from a CRC32 of its name."""
+
+    def __init__(self, org_repos: int = 150, max_stars: int = 5000):
+        """Initialize fixtures for an org of `org_repos` repos, with up to `max_stars` stargazers per repo."""
+        self.org_repos = org_repos
+        self.max_stars = max_stars
+        self.now = datetime.now(timezone.utc).replace(microsecond=0)
+        self.stars = {}
+
+    @staticmethod
+    def size(name: str, low: int, high: int) -> int:
+        """Return a stable pseudo-random integer in [low, high) for `name`."""
+        return low + zlib.crc32(name.encode()) % max(1, high - low)
+
+    def repo_nodes(self, org: str) -> list[dict]:
+        """Return the GraphQL repository nodes of `org`, every tenth one archived."""
+        pushed = (self.now - timedelta(days=3)).isoformat().replace("+00:00", "Z")
+        return [
+            {
+                "name": f"repo-{i}",
+                "stargazerCount": self.size(f"{org}/repo-{i}", 0, 50000),
+                "forkCount": self.size(f"{org}/repo-{i}/forks", 0, 5000),
+                "issues": {"totalCount": self.size(f"{org}/repo-{i}/issues", 0, 2000)},
+                "pullRequests": {"totalCount": self.size(f"{org}/repo-{i}/pulls", 0, 2000)},
+                "isArchived": i % 10 == 9,
+                "isDisabled": False,
+                "isLocked": False,
+                "isMirror": False,
+                "pushedAt": pushed,
+                "updatedAt": pushed,
+            }
+            for i in range(self.org_repos)
+        ]
+
+    def stargazers(self, repo: str) -> list[tuple[datetime, str]]:
+        """Return (starred_at, user_id) pairs for `repo`, newest first, spread evenly over the last two years."""
+        if repo not in self.stars:
+            n = self.size(repo, self.max_stars // 10, self.max_stars)
+            step = timedelta(days=730) / n
+            users = (f"U_{self.size(f'{repo}/{k}', 0, 10**7)}" for k in range(n))
+            self.stars[repo] = [(self.now - step * (k + 0.5), u) for k, u in enumerate(users)]
+        return self.stars[repo]
+
+    def platform(self, start: str, end: str) -> dict:
+        """Return portal metrics summed over the days from ISO dates `start` to `end` inclusive."""
+        keys = ("projects", "datasets", "images", "models", "exports", "totalAnnotations")
+        day, last = datetime.fromisoformat(start), datetime.fromisoformat(end)
+        totals = dict.fromkeys(keys, 0)
+        while day <= last:
+            for k in keys:
+                totals[k] += self.size(f"{k}/{day:%Y-%m-%d}", 0, 1000)
+            day += timedelta(days=1)
+        return totals
+
+    def profile(self, user_id: str) -> dict | None:
+        """Return the GraphQL User node for `user_id`, about half with a public email and a few deleted."""
+        h = self.size(user_id, 0, 100)
+        if h < 3:
+            return None
+        return {
+            "id": user_id,
+            "login": user_id.lower(),
+            "name": f"User {user_id}",
+            "company": "Acme" if h % 3 == 0 else None,
+            "email": f"{user_id.lower()}@example.com" if h % 2 == 0 else "",
+            "location": "Earth",
+            "url": f"https://github.com/{user_id.lower()}",
+            "followers": {"totalCount": h},
+        }
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """Local HTTP stand-in routing /{host}/{path} to fixture responses, counting requests and bytes per host.
+
+    Each response is delayed by `latency` seconds, a fraction `errors` fail (429 with Retry-After on REST endpoints,
+    502 on GraphQL, as the real APIs do), and api.github.com replies carry rate-limit headers for a budget of `budget`
+    requests per `window` seconds per bearer token, answering 429 once that token's budget is spent.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, fixtures: Fixtures, latency=0.02, errors=0.0, budget=5000, window=60.0, seed=0):
+        """Bind to a free localhost port with the given fixtures and fault injection settings."""
+        super().__init__(("127.0.0.1", 0), ReplayHandler)
+        self.fixtures = fixtures
+        self.latency, self.errors = latency, errors
+        self.budget, self.window = budget, window
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests, self.bytes, self.failures = 0, 0, 0
+        self.limits = {}  # bearer token -> [window end, requests used]
+
+    @property
+    def url(self) -> str:
+        """Base URL of the running server."""
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def counters(self) -> dict:
+        """Return a snapshot of request, byte and injected failure counts, and requests per token this window."""
+        with self.lock:
+            tokens = {token[-6:]: used for token, (_, used) in self.limits.items()}
+            return {"requests": self.requests, "bytes": self.bytes, "failures": self.failures, "tokens": tokens}
+
+    def rate_limit(self, token: str) -> tuple[int, int]:
+        """Spend one request from the GitHub budget of `token` and return (remaining, reset epoch)."""
+        with self.lock:
+            now = time.time()
+            limit = self.limits.setdefault(token, [now + self.window, 0])
+            if now >= limit[0]:
+                limit[:] = now + self.window, 0
+            limit[1] += 1
+            return self.budget - limit[1], int(limit[0]) + 1
+
+    def inject(self) -> bool:
+        """Return True if this request should fail."""
+        with self.lock:
+            fail = self.random.random() < self.errors
+            self.failures += fail
+            return fail
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """Serve fixture responses for the fetchers' endpoints."""
+
+    server: ReplayServer
+    protocol_version = "HTTP/1.1"  # keep-alive, as the real APIs
+    disable_nagle_algorithm = True  # headers and body are separate writes, avoid delayed-ACK stalls
+
+    def log_message(self, format, *args):
+        """Silence per-request logging."""
+
+    def do_GET(self):
+        """Handle a REST GET."""
+        self.handle_request()
+
+    def do_POST(self):
+        """Handle a GraphQL POST."""
+        self.handle_request()
+
+    def handle_request(self):
+        """Route the request to its fixture and send it with latency, fault injection and rate-limit headers."""
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+        parts = urlsplit(self.path)
+        host, _, path = parts.path.lstrip("/").partition("/")
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        if host == "_stats":  # control endpoint, not counted
+            return self.send(200, self.server.counters(), {}, count=False)
+        time.sleep(self.server.latency)
+
+        headers, self.limit = {}, (0, 0)
+        if host == "api.github.com":
+            remaining, reset = self.limit = self.server.rate_limit(self.headers.get("Authorization", ""))
+            headers = {"X-RateLimit-Limit": self.server.budget, "X-RateLimit-Remaining": max(0, remaining)}
+            headers["X-RateLimit-Reset"] = reset
+            if remaining < 0:
+                return self.send(429, {"message": "API rate limit exceeded"}, {**headers, "Retry-After": 1})
+        if self.server.inject():
+            if path == "graphql":
+                return self.send(502, {"message": "Bad gateway"}, headers)
+            return self.send(429, {"message": "Too many requests"}, {**headers, "Retry-After": 1})
+
+        route = self.route(host, path, query, body)
+        if route is None:
+            return self.send(404, {"message": "Not Found"}, headers)
+        status, payload, extra = route
+        self.send(status, payload, {**headers, **extra})
+
+    def route(self, host: str, path: str, query: dict, body: dict) -> tuple | None:
+        """Return (status, payload, headers) for a known endpoint, or None."""
+        fixtures = self.server.fixtures
+        if host == "api.github.com" and path == "graphql":
+            return 200, self.graphql(body.get("query", ""), body.get("variables") or {}), {}
+        if host == "api.github.com" and (m := re.fullmatch(r"repos/([^/]+)/([^/]+)(/\w+)?", path)):
+            repo = f"{m[1]}/{m[2]}"
+            if m[3] == "/contributors":
+                last = fixtures.size(f"{repo}/contributors", 1, 400)
+                link = (
+                    f'<https://api.github.com/repos/{repo}/contributors?per_page=1&anon=true&page={last}>; rel="last"'
+                )
+                return 200, [{"login": "octocat", "contributions": 1}], {"Link": link}
+            if m[3] == "/stargazers":
+                page, per_page = int(query.get("page", 1)), int(query.get("per_page", 30))
+                if page > 400:
+                    return 422, {"message": "Pagination is limited for this resource"}, {}
+                stars = fixtures.stargazers(repo)[::-1][(page - 1) * per_page : page * per_page]
+                users = [{"starred_at": t.isoformat(), "user": {"node_id": u, "login": u.lower()}} for t, u in stars]
+                return 200, users, {}
+            if m[3] is None:
+                return 200, {"full_name": repo, "stargazers_count": len(fixtures.stargazers(repo))}, {}
+        if host == "pypistats.org" and (m := re.fullmatch(r"api/packages/([^/]+)/recent", path)):
+            day = fixtures.size(m[1], 100, 100000)
+            return 200, {"data": {"last_day": day, "last_week": 7 * day, "last_month": 30 * day}, "package": m[1]}, {}
+        if host == "api.pepy.tech" and (m := re.fullmatch(r"api/v2/projects/([^/]+)", path)):
+            return 200, {"id": m[1], "total_downloads": fixtures.size(m[1], 10**5, 10**9)}, {}
+        if host == "img.shields.io" and (m := re.fullmatch(r"reddit/subreddit-subscribers/([^/]+)\.json", path)):
+            return 200, {"label": f"r/{m[1]}", "value": f"{fixtures.size(m[1], 10, 999) / 10:.1f}k"}, {}
+        if host == "portal.ultralytics.com" and path == "api/analytics/platform-metrics/mongodb":
+            return 200, fixtures.platform(query.get("start", "2026-01-13"), query.get("end", "2026-01-13")), {}
+        return None
+
+    def graphql(self, query: str, variables: dict) -> dict:
+        """Answer the aliased organization repositories and stargazers and the `nodes(ids:)` queries of the fetchers."""
+        fixtures = self.server.fixtures
+        remaining, reset = self.limit
+        data = {"rateLimit": {"cost": 1, "remaining": max(0, remaining), "resetAt": _iso(reset)}}
+        for i in re.findall(r"o(\d+): organization\(", query):
+            start = int(variables.get(f"c{i}") or 0)
+            nodes = fixtures.repo_nodes(variables[f"o{i}"])
+            page = {"hasNextPage": start + 100 < len(nodes), "endCursor": str(start + 100)}
+            data[f"o{i}"] = {"repositories": {"pageInfo": page, "nodes": nodes[start : start + 100]}}
+        if "nodes(ids:" in query:
+            data["nodes"] = [fixtures.profile(x) for x in variables.get("ids", [])]
+        for alias, owner, name in re.findall(r'(r\d+): repository\(owner: "([^"]+)", name: "([^"]+)"\)', query):
+            stars = fixtures.stargazers(f"{owner}/{name}")
+            start = int(variables.get(f"c{alias[1:]}") or 0)
+            edges = [
+                {"starredAt": _iso(t.timestamp()), "node": {"id": u, "login": u.lower()}}
+                for t, u in stars[start : start + 100]
+            ]
+            page = {"hasNextPage": start + 100 < len(stars), "endCursor": str(start + 100)}
+            data[alias] = {"stargazers": {"totalCount": len(stars), "pageInfo": page, "edges": edges}}
+        return {"data": data}
+
+    def send(self, status: int, payload, headers: dict, count: bool = True) -> None:
+        """Send a JSON response and count it and its bytes unless `count` is False."""
+        content = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        for k, v in headers.items():
+            self.send_header(k, str(v))
+        self.end_headers()
+        self.wfile.write(content)
+        if not count:
+            return
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.bytes += len(content)
+
+
+def _iso(timestamp: float) -> str:
+    """Format a POSIX timestamp as a GitHub-style UTC ISO 8601 string."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def serve(options: dict, ready) -> None:
+    """Run a ReplayServer built from `options` in this process, putting its URL on the `ready` queue."""
+    fixtures = Fixtures(options.pop("org_repos"), options.pop("max_stars"))
+    server = ReplayServer(fixtures, **options)
+    ready.put(server.url)
+    server.serve_forever()
+
+
+def counters(url: str) -> dict:
+    """Return the request, byte and failure counters of the replay server at `url`."""
+    with urlopen(f"{url}/_stats", timeout=10) as r:
+        return json.loads(r.read())
+
+
+def benchmarks(tmp: Path, days: int = 30, samples: int = 15, orgs: tuple = ("ultralytics",), tokens: int = 3) -> dict:
+    """Return {source: callable} running each fetcher against the stand-in, writing outputs under `tmp`.
+
+    'github_pool' repeats the 'github' run with a pool of `tokens` tokens, each with its own stand-in budget.
+    """
+    token = TokenPool(["replay-token"])
+    pool = TokenPool([f"replay-token-{i}" for i in range(tokens)])
+    return {
+        "github": lambda: fetch_github_stats(list(orgs), token, tmp / "github.json", workers=8, refresh_days=0),
+        "github_pool": lambda: fetch_github_stats(list(orgs), pool, tmp / "github.json", workers=8, refresh_days=0),
+        "pypi": lambda: fetch_pypi_stats(PYPI_PACKAGES, tmp / "pypi.json", "replay-key"),
+        "reddit": lambda: fetch_reddit_stats("ultralytics", tmp / "reddit.json"),
+        "platform": lambda: fetch_platform_stats(
+            "https://portal.ultralytics.com", "replay-key", tmp / "platform.json", tmp / "platform_partials.json"
+        ),
+        "stars": lambda: count_stars.run(
+            token="replay-token", days=days, save=True, cache=str(tmp / "stars.db"), output=str(tmp / "users.csv")
+        ),
+        "star_history": lambda: [count_stars.estimate_star_history(r, token, samples) for r in count_stars.REPOS[:5]],
+    }
+
+
+def measure(fn, url: str, memory: bool = True, verbose: bool = False) -> dict:
+    """Run `fn` once and return its wall time, requests, bytes, injected failures, throttled time and peak memory."""
+    before, throttled = counters(url), sum(LIMITER.throttled.values())
+    if memory:
+        tracemalloc.start()
+    sink = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    quiet = contextlib.nullcontext() if verbose else contextlib.redirect_stderr(io.StringIO())
+    t, ok = time.perf_counter(), True
+    try:
+        with sink, quiet:
+            fn()
+    except BaseException as e:  # includes SystemExit raised by sys.exit() inside fetchers
+        ok = False
+        print(f"Warning: benchmark failed: {e!r}")
+    wall = time.perf_counter() - t
+    peak = tracemalloc.get_traced_memory()[1] if memory else 0
+    if memory:
+        tracemalloc.stop()
+    after = counters(url)
+    return {
+        "ok": ok,
+        "wall_s": round(wall, 3),
+        **{k: after[k] - before[k] for k in ("requests", "bytes", "failures")},
+        "throttled_s": round(sum(LIMITER.throttled.values()) - throttled, 3),
+        "peak_mb": round(peak / 2**20, 2),
+    }
+
+
+def import_time(module: str) -> float:
+    """Return the cold import time of `module` in ms, minus that of `requests`, via -X importtime in a new process."""
+    cmd = [sys.executable, "-X", "importtime", "-c", f"import {module}"]
+    stderr = subprocess.run(cmd, capture_output=True, text=True, cwd=Path(__file__).parent, check=True).stderr
+    cumulative = {}
+    for line in stderr.splitlines():  # 'import time: self [us] | cumulative | imported package'
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            cumulative.setdefault(parts[2].strip(), int(parts[1]))
+    return round((cumulative.get(module, 0) - cumulative.get("requests", 0)) / 1000, 1)
+
+
+def check_imports(budgets: dict = IMPORT_BUDGETS_MS) -> tuple[dict, list[str]]:
+    """Measure the import time of every module in `budgets`, returning ({module: ms}, [over-budget messages])."""
+    times = {module: min(import_time(module) for _ in range(3)) for module in budgets}
+    over = [f"{m} imports in {ms:.1f} ms, budget {budgets[m]} ms" for m, ms in times.items() if ms > budgets[m]]
+    return times, over
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Return a message for every metric of `results` more than `threshold` times its baseline value."""
+    regressions = []
+    for source, metrics in results.items():
+        base = baseline.get(source)
+        if not base:
+            continue
+        for metric, slack in METRICS.items():
+            new, old = metrics.get(metric, 0), base.get(metric, 0)
+            if new > old * threshold and new - old > slack:
+                regressions.append(f"{source} {metric}: {old} -> {new} ({new / old if old else float('inf'):.2f}x)")
+    return regressions
+
+
+def parse_opt(argv: list[str] | None = None):
+    """Parse command-line options for the benchmark from `argv` (default: sys.argv)."""
+    names = list(benchmarks(Path()))
+    parser = argparse.ArgumentParser(description="Benchmark fetchers against a local replay server")
+    parser.add_argument("--sources", nargs="+", choices=names, default=names, help="Sources to benchmark")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds added to every response")
+    parser.add_argument("--errors", type=float, default=0.0, help="Fraction of responses failing with 429/5xx")
+    parser.add_argument("--budget", type=int, default=5000, help="GitHub rate-limit budget per token and window")
+    parser.add_argument("--tokens", type=int, default=3, help="Tokens in the github_pool source's pool")
+    parser.add_argument("--window", type=float, default=60, help="GitHub rate-limit window in seconds")
+    parser.add_argument("--repos", type=int, default=150, help="Repositories in each fixture org")
+    parser.add_argument("--orgs", type=str, default="ultralytics", help="Comma-separated orgs for the github source")
+    parser.add_argument("--max-stars", type=int, default=5000, help="Maximum stargazers per fixture repo")
+    parser.add_argument("--days", type=int, default=30, help="Trailing days counted by the stars benchmark")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per source, reporting the fastest")
+    parser.add_argument("--seed", type=int, default=0, help="Error injection random seed")
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc, which slows allocation-heavy code")
+    parser.add_argument("--http-cache", action="store_true", help="Keep the on-disk HTTP response cache enabled")
+    parser.add_argument("--save", type=str, default="", help="Write results JSON, e.g. as a baseline")
+    parser.add_argument("--baseline", type=str, default="", help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Regression ratio against the baseline")
+    parser.add_argument("--no-imports", action="store_true", help="Skip the import-time budget check")
+    parser.add_argument("--verbose", action="store_true", help="Show fetcher output")
+    return parser.parse_args(argv)
+
+
+def main(opt) -> int:
+    """Run the selected benchmarks and return the process exit code (1 on failure or regression)."""
+    options = {"org_repos": opt.repos, "max_stars": opt.max_stars, "latency": opt.latency, "errors": opt.errors}
+    options.update(budget=opt.budget, window=opt.window, seed=opt.seed)
+    ready = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(options, ready), daemon=True)
+    server.start()
+    utils.REPLAY_URL = ready.get(timeout=30)
+    if not opt.http_cache:
+        utils.HTTP_CACHE = None
+
+    results = {}
+    print(
+        f"{'source':14s}{'wall s':>9s}{'requests':>10s}{'KB':>10s}{'failures':>10s}{'throttled s':>13s}{'peak MB':>9s}"
+    )
+    for name in opt.sources:
+        runs = []
+        for _ in range(max(1, opt.repeat)):
+            with tempfile.TemporaryDirectory() as tmp:  # fresh outputs and caches for every run
+                runs.append(
+                    measure(
+                        benchmarks(Path(tmp), opt.days, orgs=opt.orgs.split(","), tokens=opt.tokens)[name],
+                        utils.REPLAY_URL,
+                        not opt.no_memory,
+                        opt.verbose,
+                    )
+                )
+        r = results[name] = min(runs, key=lambda x: x["wall_s"])
+        print(
+            f"{name:14s}{r['wall_s']:9.2f}{r['requests']:10d}{r['bytes'] / 1024:10.1f}{r['failures']:10d}"
+            f"{r['throttled_s']:13.2f}{r['peak_mb']:9.2f}" + ("" if r["ok"] else "  FAILED")
+        )
+    server.terminate()
+
+    code = 0 if all(r["ok"] for r in results.values()) else 1
+    if not opt.no_imports:
+        results["imports"], over = check_imports()
+        print("imports (ms, excluding requests): " + ", ".join(f"{m} {t:.1f}" for m, t in results["imports"].items()))
+        for line in over:
+            print(f"Over budget: {line}")
+        code = code or int(bool(over))
+
+    if opt.save:
+        Path(opt.save).write_text(json.dumps(results, indent=2))
+        print(f"Results saved to {opt.save}")
+    if opt.baseline:
+        regressions = compare(results, json.loads(Path(opt.baseline).read_text()), opt.threshold)
+        for line in regressions:
+            print(f"Regression: {line}")
+        print(f"{len(regressions)} regressions against {opt.baseline} (threshold {opt.threshold:.2f}x)")
+        code = code or int(bool(regressions))
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_opt()))
@@ -6,17 +6,32 @@ Usage:
     $ python count_stars.py --token YOUR_GITHUB_TOKEN --days 30
 """
 
+from __future__ import annotations
+
 import argparse
+import csv
+import json
+import sqlite3
+import sys
 import time
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from utils import LIMITER, TokenPool, http_get, post_json, retry_request
 
-import pandas as pd
-from github import Github  # pip install PyGithub
-from tqdm import tqdm
+if TYPE_CHECKING:  # numpy, pandas and tqdm are imported where used, keeping CLI startup fast
+    import numpy as np
+    import pandas as pd
 
 # GitHub Personal Access Token
 GITHUB_TOKEN = ""  # i.e. 'ghp_1gwB...'
 
+# Local stargazer cache
+CACHE_DIR = Path(__file__).parent / "cache"
+
 # Repositories to track
 REPOS = [
     # Ultralytics
@@ -70,17 +85,473 @@ REPOS = [
 ]
 
 
+USER_FIELDS = "id login name company email location url followers { totalCount }"
+
+
+def parse_time(value: str) -> datetime:
+    """Parse a GitHub ISO 8601 timestamp such as '2024-01-31T12:00:00Z' to an aware UTC datetime."""
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def iter_stargazer_pages(repos, token, stop, batch=10, cursors=None):
+    """Yield stargazer pages newest-first for several repos, packing up to `batch` repos into one aliased GraphQL query.
+
+    Args:
+        repos (list[str]): Repositories in 'owner/name' format.
+        token (str | TokenPool): GitHub personal access token or token pool (GraphQL requires authentication).
+        stop (datetime | dict): Cutoff datetime, or a per-repo dict of cutoffs. A repo is finished at its first edge
+            older than its cutoff.
+        batch (int): Maximum number of repos fetched per GraphQL round trip.
+        cursors (dict | None): Optional per-repo end cursors to continue from, e.g. restored from a checkpoint.
+
+    Yields:
+        (tuple): (repo, total_stars, edges, end_cursor, done), where edges is a list of (starred_at, node) tuples and
+            each node holds the user 'id' and 'login'.
+
+    Raises:
+        RuntimeError: If a response is missing a repo's block or reports an error for it, so a failed lookup is never
+            taken as a repo with no stars.
+    """
+    stop = stop if isinstance(stop, dict) else dict.fromkeys(repos, stop)
+    cursors, pending = dict(cursors or {}), list(repos)
+    while pending:
+        chunk = pending[:batch]
+        blocks = []
+        for i, repo in enumerate(chunk):
+            owner, name = repo.split("/")
+            blocks.append(
+                f"r{i}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{ stargazers(first: 100, "
+                f"after: $c{i}, orderBy: {{field: STARRED_AT, direction: DESC}}) {{ totalCount "
+                f"pageInfo {{ hasNextPage endCursor }} edges {{ starredAt node {{ id login }} }} }} }}"
+            )
+        args = ", ".join(f"$c{i}: String" for i in range(len(chunk)))
+        query = f"query({args}) {{ rateLimit {{ cost remaining resetAt }} {' '.join(blocks)} }}"
+        variables = {f"c{i}": cursors.get(repo) for i, repo in enumerate(chunk)}
+        data = post_json("https://api.github.com/graphql", {}, {"query": query, "variables": variables}, token=token)
+        results = data.get("data") or {}
+        failed = {(e.get("path") or [None])[0] for e in data.get("errors") or []}
+        if any(not results.get(f"r{i}") or f"r{i}" in failed for i in range(len(chunk))):  # e.g. RATE_LIMITED
+            raise RuntimeError(f"GraphQL errors: {data.get('errors')}")
+
+        for i, repo in enumerate(chunk):
+            stargazers = results[f"r{i}"]["stargazers"]
+            page_info = stargazers["pageInfo"]
+            edges, done = [], not page_info["hasNextPage"]
+            for edge in stargazers["edges"]:
+                starred_at = parse_time(edge["starredAt"])
+                if starred_at < stop[repo]:
+                    done = True
+                    break
+                edges.append((starred_at, edge["node"]))
+            cursors[repo] = page_info["endCursor"]
+            if done:
+                pending.remove(repo)
+            yield repo, stargazers["totalCount"], edges, cursors[repo], done
+
+
+class StarCache:
+    """On-disk SQLite store of (repo, user, starred_at) star events with a per-repo sync high-water mark.
+
+    Each repo row records `newest` (latest synced star) and `floor` (every star at or after this time is cached), so a
+    run only fetches stars newer than `newest` whenever the requested window starts at or after `floor`.
+    """
+
+    def __init__(self, path=CACHE_DIR / "stars.db"):
+        """Open or create the cache database at `path`."""
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS stars (
+                repo TEXT, user_id TEXT, login TEXT, starred_at INTEGER, PRIMARY KEY (repo, user_id));
+            CREATE INDEX IF NOT EXISTS stars_repo_time ON stars (repo, starred_at);
+            CREATE TABLE IF NOT EXISTS repos (
+                repo TEXT PRIMARY KEY, total INTEGER, newest INTEGER, floor INTEGER, synced_at INTEGER);
+            """
+        )
+
+    def stops(self, repos, cutoff: datetime) -> dict:
+        """Return per-repo fetch cutoffs: the high-water mark if the cache already covers `cutoff`, else `cutoff`."""
+        stops = {}
+        for repo in repos:
+            row = self.db.execute("SELECT newest, floor FROM repos WHERE repo = ?", (repo,)).fetchone()
+            covered = row and row[1] is not None and row[1] <= cutoff.timestamp()
+            stops[repo] = datetime.fromtimestamp(row[0], timezone.utc) if covered and row[0] else cutoff
+        return stops
+
+    def add(self, repo: str, edges: list) -> None:
+        """Insert (starred_at, node) edges for `repo`, keeping the latest star time per user."""
+        self.db.executemany(
+            "INSERT OR REPLACE INTO stars VALUES (?, ?, ?, ?)",
+            [(repo, u["id"], u.get("login"), int(t.timestamp())) for t, u in edges],
+        )
+        self.db.commit()
+
+    def record(self, repo: str, user: dict, starred_at: datetime | None) -> bool:
+        """Insert one star by `user` (a node with 'id' and 'login'), or delete it if `starred_at` is None.
+
+        Returns True if the cache changed; a star that is already cached is kept as is, so a star reported twice is
+        only recorded once.
+        """
+        if starred_at is None:
+            cursor = self.db.execute("DELETE FROM stars WHERE repo = ? AND user_id = ?", (repo, user["id"]))
+        else:
+            cursor = self.db.execute(
+                "INSERT OR IGNORE INTO stars VALUES (?, ?, ?, ?)",
+                (repo, user["id"], user.get("login"), int(starred_at.timestamp())),
+            )
+        self.db.commit()
+        return cursor.rowcount > 0
+
+    def consistent(self, repo: str, total: int) -> bool:
+        """Check that the previous sync's total plus the stars cached since its high-water mark equals `total`.
+
+        Incremental syncs never see unstars, so a live `total` that disagrees with this sum means some cached rows are
+        stale. Repos without a previous sync are consistent.
+        """
+        row = self.db.execute("SELECT total, newest FROM repos WHERE repo = ?", (repo,)).fetchone()
+        if not row or row[0] is None or row[1] is None:
+            return True
+        query = "SELECT COUNT(*) FROM stars WHERE repo = ? AND starred_at > ?"
+        return row[0] + self.db.execute(query, (repo, row[1])).fetchone()[0] == total
+
+    def clear(self, repo: str) -> None:
+        """Drop all cached stars and the sync state of `repo`."""
+        self.db.execute("DELETE FROM stars WHERE repo = ?", (repo,))
+        self.db.execute("DELETE FROM repos WHERE repo = ?", (repo,))
+        self.db.commit()
+
+    def mark_synced(self, repo: str, total: int, stop: datetime) -> None:
+        """Record a completed sync of `repo` down to `stop`, advancing the high-water mark and coverage floor."""
+        newest = self.db.execute("SELECT MAX(starred_at) FROM stars WHERE repo = ?", (repo,)).fetchone()[0]
+        self.db.execute(
+            """
+            INSERT INTO repos VALUES (?, ?, ?, ?, ?) ON CONFLICT (repo) DO UPDATE SET
+            total = excluded.total, newest = excluded.newest, synced_at = excluded.synced_at,
+            floor = MIN(COALESCE(floor, excluded.floor), excluded.floor)
+            """,
+            (repo, total, newest, int(stop.timestamp()), int(time.time())),
+        )
+        self.db.commit()
+
+    def events(self, repo: str, since: datetime) -> list[tuple]:
+        """Return cached (starred_at, user_id) events for `repo` at or after `since`, newest first."""
+        rows = self.db.execute(
+            "SELECT starred_at, user_id FROM stars WHERE repo = ? AND starred_at >= ? ORDER BY starred_at DESC",
+            (repo, int(since.timestamp())),
+        )
+        return [(datetime.fromtimestamp(x, timezone.utc), user_id) for x, user_id in rows]
+
+    def times(self, repo: str, since: datetime) -> np.ndarray:
+        """Return cached star times for `repo` at or after `since` as a sorted datetime64[s] array."""
+        import numpy as np
+
+        rows = self.db.execute(
+            "SELECT starred_at FROM stars WHERE repo = ? AND starred_at >= ? ORDER BY starred_at",
+            (repo, int(since.timestamp())),
+        )
+        return np.fromiter((x for (x,) in rows), dtype=np.int64).astype("datetime64[s]")
+
+
+class ProfileCache:
+    """On-disk SQLite cache of GitHub user profiles keyed by node id, evicting entries older than `ttl` days."""
+
+    def __init__(self, path=CACHE_DIR / "stars.db", ttl=30):
+        """Open or create the profile table at `path` and evict expired profiles."""
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS profiles (id TEXT PRIMARY KEY, data TEXT, fetched_at INTEGER)")
+        self.db.execute("DELETE FROM profiles WHERE fetched_at < ?", (int(time.time() - ttl * 86400),))
+        self.db.commit()
+
+    def get(self, ids) -> dict:
+        """Return cached profiles for `ids` as {id: profile}, where deleted users map to None."""
+        found = {}
+        ids = list(ids)
+        for i in range(0, len(ids), 500):
+            chunk = ids[i : i + 500]
+            rows = self.db.execute(
+                f"SELECT id, data FROM profiles WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            found.update((k, json.loads(v)) for k, v in rows)
+        return found
+
+    def put(self, profiles: dict) -> None:
+        """Store {id: profile} entries with the current time."""
+        now = int(time.time())
+        self.db.executemany(
+            "INSERT OR REPLACE INTO profiles VALUES (?, ?, ?)", [(k, json.dumps(v), now) for k, v in profiles.items()]
+        )
+        self.db.commit()
+
+
+def fetch_user_profiles(ids, token, cache=None, progress=True) -> dict:
+    """Fetch user profiles for GitHub node `ids` via batched GraphQL `nodes` lookups of up to 100 users per request.
+
+    Args:
+        ids (Iterable[str]): User node ids, duplicates are looked up once.
+        token (str | TokenPool): GitHub personal access token or token pool.
+        cache (ProfileCache | None): Optional profile cache, only ids missing from it are fetched.
+        progress (bool): Show a progress bar while fetching missing profiles.
+
+    Returns:
+        (dict): Mapping of user id to profile dict, or None for users that no longer exist.
+
+    Raises:
+        RuntimeError: If a response has no `nodes` list matching its ids, so failed lookups are never cached.
+    """
+    from tqdm import tqdm
+
+    ids = list(dict.fromkeys(ids))
+    profiles = cache.get(ids) if cache else {}
+    missing = [x for x in ids if x not in profiles]
+    nodes = f"nodes(ids: $ids) {{ ... on User {{ {USER_FIELDS} }} }}"
+    query = f"query($ids: [ID!]!) {{ rateLimit {{ cost remaining resetAt }} {nodes} }}"
+    for i in tqdm(range(0, len(missing), 100), desc="Profiles", disable=not (progress and missing)):
+        chunk = missing[i : i + 100]
+        payload = {"query": query, "variables": {"ids": chunk}}
+        data = post_json("https://api.github.com/graphql", {}, payload, token=token)
+        nodes = (data.get("data") or {}).get("nodes")
+        if not isinstance(nodes, list) or len(nodes) != len(chunk):  # e.g. RATE_LIMITED, never cache as deleted
+            raise RuntimeError(f"GraphQL errors: {data.get('errors')}")
+        found = {k: (node or None) for k, node in zip(chunk, nodes)}
+        if cache:
+            cache.put(found)
+        profiles.update(found)
+    return profiles
+
+
+class UserExport:
+    """Append-only users CSV with a JSON checkpoint of per-repo stargazer cursors, so `--save` runs can resume.
+
+    Rows are flushed as each page is enriched and the checkpoint records the CSV byte offset next to the cursors, so
+    a resumed run truncates any rows written after the last checkpoint and continues without duplicates. Used as a
+    context manager, the CSV is closed on errors too while the checkpoint is kept for `--resume`.
+    """
+
+    columns = ("Repo", "Name", "Company", "Email", "Location", "GitHub", "Followers", "Date")
+
+    def __init__(self, path="users.csv", resume=False):
+        """Open `path` for appending, restoring the checkpoint state if `resume` and one exists, else starting over."""
+        self.path = Path(path)
+        self.checkpoint = self.path.with_name(f"{self.path.stem}.checkpoint.json")
+        resume = resume and self.checkpoint.exists() and self.path.exists()
+        self.state = json.loads(self.checkpoint.read_text()) if resume else {}
+        self.rows = self.state.get("rows", 0)
+        self.file = self.path.open("r+" if resume else "w", newline="", encoding="utf-8")
+        if resume:
+            self.file.truncate(self.state["bytes"])
+            self.file.seek(self.state["bytes"])
+        else:
+            csv.writer(self.file).writerow(["", *self.columns])
+        self.writer = csv.writer(self.file)
+
+    def __enter__(self):
+        """Return the export for use in a `with` block."""
+        return self
+
+    def __exit__(self, *exc):
+        """Close the CSV, keeping the checkpoint unless `close()` already completed the export."""
+        self.file.close()
+
+    def write(self, repo: str, events, profiles: dict) -> int:
+        """Append one row per (starred_at, user_id) event whose profile has a public email, returning rows written."""
+        n = self.rows
+        for starred_at, user_id in events:
+            u = profiles.get(user_id)
+            if u and u.get("email"):
+                followers = (u.get("followers") or {}).get("totalCount", 0)
+                row = [repo, u.get("name"), u.get("company"), u["email"], u.get("location"), u.get("url"), followers]
+                self.writer.writerow([self.rows, *row, starred_at])
+                self.rows += 1
+        self.file.flush()
+        return self.rows - n
+
+    def save(self, **state) -> None:
+        """Atomically checkpoint `state` (cutoff, stops, cursors, done repos) with the current row count and offset."""
+        self.state.update(state, rows=self.rows, bytes=self.file.tell())
+        tmp = self.checkpoint.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.state))
+        tmp.replace(self.checkpoint)
+
+    def close(self) -> None:
+        """Close the CSV and remove the checkpoint of this completed export."""
+        self.file.close()
+        self.checkpoint.unlink(missing_ok=True)
+
+
+def star_velocity(times: dict, days: int, now: datetime | None = None) -> dict:
+    """Compute star velocity tables for all repos in one vectorized pass over per-repo datetime64 arrays.
+
+    Args:
+        times (dict): Mapping of repo to a datetime64 array of star times.
+        days (int): Trailing days to analyze, binned into 24-hour days starting at `now - days`, so the tables cover
+            exactly the same window as a star count since that cutoff.
+        now (datetime, optional): End of the window, defaults to the current time.
+
+    Returns:
+        (dict): pandas DataFrames 'daily', 'weekly' and 'monthly' (period x repo star counts), 'rolling' (7-day mean
+            stars/day), 'acceleration' (day-over-day change of the rolling rate) and 'summary' (one row per repo).
+    """
+    import numpy as np
+    import pandas as pd
+
+    repos = list(times)
+    end = np.datetime64((now or datetime.now(timezone.utc)).replace(tzinfo=None), "s")
+    start = end - np.timedelta64(days * 86400, "s")
+    stamps = np.concatenate([np.asarray(times[r], dtype="datetime64[s]") for r in repos] or [[]]).astype(
+        "datetime64[s]"
+    )
+    repo_idx = np.repeat(np.arange(len(repos)), [len(times[r]) for r in repos])
+    day_idx = (stamps - start).astype(np.int64) // 86400
+    keep = (day_idx >= 0) & (day_idx < days)
+    counts = np.bincount(repo_idx[keep] * days + day_idx[keep], minlength=len(repos) * days).reshape(len(repos), days)
+
+    daily = pd.DataFrame(counts.T, index=pd.date_range(str(start), periods=days, freq="D", name="date"), columns=repos)
+    rolling = daily.rolling(7, min_periods=1).mean()
+    acceleration = rolling.diff().fillna(0.0)
+    summary = pd.DataFrame(
+        {
+            "stars": counts.sum(1),
+            "stars/day": counts.sum(1) / days,
+            "stars/day (7d)": rolling.iloc[-1].to_numpy() if days else 0.0,
+            "acceleration (7d)": acceleration.iloc[-7:].mean().to_numpy() if days else 0.0,
+        },
+        index=pd.Index(repos, name="repo"),
+    )
+    return {
+        "daily": daily,
+        "weekly": daily.resample("W").sum(),
+        "monthly": daily.resample("MS").sum(),
+        "rolling": rolling,
+        "acceleration": acceleration,
+        "summary": summary,
+    }
+
+
+def write_report(tables: dict, path: str | Path) -> list[Path]:
+    """Write velocity tables next to `path` as '<stem>_<table>.csv' or '.parquet', depending on the suffix."""
+    path = Path(path)
+    files = []
+    for name, df in tables.items():
+        f = path.with_name(f"{path.stem}_{name}{path.suffix or '.csv'}")
+        if f.suffix == ".parquet":
+            df.to_parquet(f)
+        else:
+            df.to_csv(f)
+        files.append(f)
+    return files
+
+
+def estimate_star_history(
+    repo: str, token: str | TokenPool = "", samples: int = 15, max_pages: int = 400
+) -> pd.DataFrame:
+    """Estimate the cumulative star curve of a repo from a fixed number of sampled stargazer pages.
+
+    Stargazers are listed oldest-first, so the first star on page p is star number 100 * (p - 1) + 1 and its
+    `starred_at` gives one exact (date, count) point. Sampling `samples` evenly spaced pages plus the current total
+    costs samples + 1 requests regardless of repo size. GitHub serves at most `max_pages` pages (40k stars), so the
+    curve between the last reachable page and today is interpolated towards the current total.
+
+    Args:
+        repo (str): Repository in 'owner/name' format.
+        token (str | TokenPool): Optional GitHub personal access token or token pool.
+        samples (int): Number of stargazer pages to sample.
+        max_pages (int): Deepest stargazer page GitHub allows.
+
+    Returns:
+        (pd.DataFrame): Daily 'stars' estimates indexed by date with 'lower'/'upper' bounds, which bracket the true
+            count because the curve is monotonic between exact sample points.
+    """
+    import numpy as np
+    import pandas as pd
+
+    headers = {"Accept": "application/vnd.github.star+json"}
+    url = f"https://api.github.com/repos/{repo}"
+    total = retry_request(http_get, url, headers=headers, timeout=60, token=token).json()["stargazers_count"]
+    pages = max(1, min(max_pages, -(-total // 100)))
+
+    def sample(page: int) -> tuple:
+        """Return (starred_at, count) of the first star on `page`, or None if the page is unavailable."""
+        params = {"per_page": 100, "page": page}
+        r = retry_request(http_get, f"{url}/stargazers", headers=headers, params=params, timeout=60, token=token)
+        items = r.json() if r.status_code == 200 else []
+        return (parse_time(items[0]["starred_at"]), 100 * (page - 1) + 1) if items else None
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        sampled = np.unique(np.linspace(1, pages, samples).round().astype(int)).tolist()
+        points = [p for p in pool.map(sample, sampled) if p]
+    day = points[0][0].replace(hour=0, minute=0, second=0, microsecond=0) if points else None
+    if points and points[0][1] == 1 and day < points[0][0]:  # no stars before the first, anchor the curve at 0
+        points.insert(0, (day, 0))
+    points.append((datetime.now(timezone.utc), total))
+
+    ts = np.array([int(t.timestamp()) for t, _ in points], dtype=np.int64)
+    counts = np.maximum.accumulate(np.array([c for _, c in points], dtype=np.int64))
+    # Daily grid from the first sample onwards, so every date lies between two exact sample points
+    dates = pd.date_range(pd.Timestamp(ts[0], unit="s").ceil("D"), pd.Timestamp(ts[-1], unit="s"), freq="D")
+    x = dates.to_numpy().astype("datetime64[s]").astype(np.int64)
+    i = np.clip(np.searchsorted(ts, x, side="right"), 1, len(ts) - 1)  # bracketing samples ts[i - 1] <= x < ts[i]
+    return pd.DataFrame(
+        {"stars": np.interp(x, ts, counts).round().astype(int), "lower": counts[i - 1], "upper": counts[i]},
+        index=pd.Index(dates, name="date"),
+    )
+
+
+def run_history(token="", samples=15, output="star_history.csv"):
+    """Estimate star histories for all `REPOS` by page sampling and write them to a CSV in long format.
+
+    Args:
+        token (str | TokenPool): Optional GitHub personal access token or token pool.
+        samples (int): Stargazer pages sampled per repo.
+        output (str): Output CSV path.
+    """
+    import pandas as pd
+    from tqdm import tqdm
+
+    t, frames = time.time(), []
+    for repo in tqdm(REPOS, desc="Star history"):
+        try:
+            df = estimate_star_history(repo, token, samples)
+        except Exception as e:
+            tqdm.write(f"Warning: Failed to estimate star history for {repo}: {e}")
+            continue
+        bound = int((df["upper"] - df["lower"]).max())
+        tqdm.write(f"{repo:40s}{int(df['stars'].iloc[-1]):,} stars, max error ±{bound:,}")
+        frames.append(df.assign(repo=repo))
+    if frames:
+        pd.concat(frames).to_csv(output)
+        print(f"Star history saved to {output}")
+    print(f"Done in {time.time() - t:.1f}s, {LIMITER.report()}")
+
+
 def run(
     token="",  # GitHub access token
     days=30,  # trailing days to analyze
     save=False,  # save user info
+    batch=10,  # repos per GraphQL request
+    cache=str(CACHE_DIR / "stars.db"),  # stargazer cache path, empty to disable
+    ttl=30,  # user profile cache lifetime in days
+    report="",  # velocity report path (.csv or .parquet)
+    output="users.csv",  # saved user info path
+    resume=False,  # continue an interrupted save from its checkpoint
 ):
     """Counts GitHub stars for specified repositories over a given period and optionally saves user information.
 
     Args:
-        token (str): GitHub personal access token. Default is an empty string which means no authentication.
+        token (str): GitHub personal access token, required by the GitHub GraphQL API. Several comma-separated tokens
+            are pooled, each request using the token with the most remaining quota.
         days (int): Number of trailing days to analyze. Default is 30.
         save (bool): Whether to save user information to a CSV file. Default is False.
+        batch (int): Number of repositories fetched per aliased GraphQL request. Default is 10.
+        cache (str): Path of the SQLite stargazer and profile cache, or an empty string to disable caching.
+        ttl (float): Days before a cached user profile is evicted and refetched. Default is 30.
+        report (str): Optional path for daily/weekly/monthly/rolling/acceleration/summary velocity tables, written as
+            '<stem>_<table>.csv' or '.parquet' by suffix.
+        output (str): CSV path for saved user information. Default is 'users.csv'.
+        resume (bool): Continue an interrupted `save` run from the checkpoint next to `output`. Default is False.
 
     Returns:
         None
@@ -90,98 +561,170 @@ def run(
         >>> run(token='your_github_token', days=30, save=True)
 
     Notes:
-        - Ensure you have a valid GitHub personal access token if you are accessing private repositories or want to avoid
-          rate limits. You can generate one at https://github.com/settings/tokens.
-        - Requires 'repos.yaml' file in the same directory with a list of repositories to analyze, in the format:
-          ```yaml
-          repositories:
-              - 'repository_owner/repository_name'
-              - 'another_owner/another_repository'
-          ```
+        - Ensure you have a valid GitHub personal access token, the GraphQL API does not allow anonymous access. You
+          can generate one at https://github.com/settings/tokens.
+        - Stargazers are read newest-first 100 per page, so only the requested window is ever fetched.
+        - With a cache, only stars newer than the last sync are fetched once a window has been covered, and any
+          window inside the cached range is answered locally.
+        - Each sync checks the cached stars against the live total; when stargazers have left since the last sync,
+          the repo's cache is dropped and the window refetched so unstarred users do not inflate the counts.
+        - With `save`, profiles are fetched 100 users per GraphQL `nodes` request, once per user across all repos.
+          Rows are streamed to `output` page by page and the stargazer cursors are checkpointed to
+          '<stem>.checkpoint.json' after every page, which is removed once the export completes.
+        - `resume` restores the original window (its `days` and end time, whatever `days` is passed) and cursors,
+          skipping repos already finished; star counts for those repos come from the cache, so resume with caching
+          enabled for complete velocity tables.
+        - Repositories to analyze are defined in the `REPOS` list of this file.
     """
+    import numpy as np
+    import pandas as pd
+    from tqdm import tqdm
+
     # Settings
     # date = datetime(2022, 3, 1)  # count stars since this day, i.e. March 1st 2022
     # days = (datetime.now() - date).total_seconds() / 86400  # compute number of days
     # days = 30  # specify days directly, i.e. last 30 days
 
     # Parameters
-    g = Github(token)  # create a GitHub instance
-    print(f"Counting stars for last {days:.1f} days from {datetime.now():%d %B %Y}\n")
-    pd.options.display.max_columns = None
+    token = TokenPool(token.split(","))
+    if not token:
+        sys.exit("GitHub token required for the GraphQL API, pass --token")
+    export = UserExport(output, resume) if save else None
+    with export or nullcontext():  # closes the CSV on errors, keeping the checkpoint
+        state = export.state if export else {}
+        if state:
+            cutoff = datetime.fromisoformat(state["cutoff"])
+            days = state.get("days", days)  # the checkpoint's window, whatever --days this run was given
+            now = datetime.fromisoformat(state["now"]) if "now" in state else cutoff + timedelta(days=days)
+            print(
+                f"Resuming {output} from checkpoint, {len(state['done'])}/{len(REPOS)} repos done, {export.rows} rows"
+            )
+        else:
+            now = datetime.now(timezone.utc)
+            cutoff = now - timedelta(days=days)
+        print(f"Counting stars for last {days:.1f} days from {now:%d %B %Y}\n")
+        pd.options.display.max_columns = None
 
-    t, users, sleep = time.time(), [], 1.39
-    for repo in REPOS:
-        r = g.get_repo(repo)
-        s = r.get_stargazers_with_dates().reversed
-        total = s.totalCount
+        store = StarCache(cache) if cache else None
+        profile_cache = ProfileCache(cache, ttl) if save and cache else None
+        profiles = {}  # in-memory profile memo, only used without a cache
 
-        dates = []
-        try:
-            pbar = tqdm(s, total=total, desc=r.full_name)
-            for x in pbar:
-                dt = (datetime.now() - x.starred_at).total_seconds() / 86400
-                if dt < days:
-                    dates.append([x.starred_at, 1])
-                    if save:
-                        time.sleep(sleep)
-                        u = x.user
-                        if u.email is not None:
-                            users.append(
-                                [
-                                    r.full_name,
-                                    u.name,
-                                    u.company,
-                                    u.email,
-                                    u.location,
-                                    u.html_url,
-                                    u.followers,
-                                    x.starred_at,
-                                ]
-                            )
-                else:
-                    n = len(dates)
-                    s1 = f"{n} stars"
-                    s2 = f"({n / days:.1f}/day)"
-                    pbar.desc = f"{r.full_name:40s}{s1:12s}{s2:12s}"
-                    break
+        def lookup(ids):
+            """Return profiles for `ids`, fetching those neither cached on disk nor already seen this run."""
+            if profile_cache:
+                return fetch_user_profiles(ids, token, profile_cache, progress=False)
+            profiles.update(fetch_user_profiles([x for x in ids if x not in profiles], token, progress=False))
+            return profiles
 
-        except Exception as e:
-            print(e)
+        if state:
+            stops = {repo: datetime.fromisoformat(x) for repo, x in state["stops"].items()}
+            cursors, done_repos = state["cursors"], state["done"]
+        else:
+            stops = store.stops(REPOS, cutoff) if store else dict.fromkeys(REPOS, cutoff)
+            cursors, done_repos = {}, []
+        pending = [repo for repo in REPOS if repo not in done_repos]
+
+        def checkpoint():
+            """Record the export position so an interrupted run resumes after the last completed page."""
+            if export:
+                stop_times = {repo: x.isoformat() for repo, x in stops.items()}
+                state = {"cutoff": cutoff.isoformat(), "now": now.isoformat(), "days": days}
+                export.save(**state, stops=stop_times, cursors=cursors, done=done_repos)
 
-        df = pd.DataFrame(dates, columns=["date", "stars"])
-        df.date = pd.to_datetime(df.date)
-        # df.to_csv(f'dates_{r.name}.csv')
-        # dg = df.groupby(pd.Grouper(key='date', freq='1M')).sum()  # group by month
-        # dg = df.groupby(pd.Grouper(key='date', freq='1D')).sum()  # group by day
+        t, n_users = time.time(), 0
+        pages, times = {repo: [] for repo in pending}, {}  # star times as datetime64[s] arrays, 8 bytes per event
+        for repo in done_repos:  # completed before a resume
+            times[repo] = store.times(repo, cutoff) if store else np.array([], dtype="datetime64[s]")
+        pbar = tqdm(total=len(REPOS), initial=len(done_repos), desc="Repos")
+        for repo, total, edges, cursor, done in iter_stargazer_pages(pending, token, stops, batch, cursors):
+            if store:
+                store.add(repo, edges)
+            pages[repo].append(np.array([int(x.timestamp()) for x, _ in edges], dtype=np.int64).astype("datetime64[s]"))
+            if export:
+                events = [(starred_at, u["id"]) for starred_at, u in edges]
+                n_users += export.write(repo, events, lookup(u for _, u in events))
+            if done:
+                if store:
+                    stop = stops[repo]
+                    if not store.consistent(repo, total):  # stargazers left since the last sync, refetch the window
+                        tqdm.write(f"Warning: {repo} cache disagrees with {total:,} live stars, refetching window")
+                        store.clear(repo)
+                        for _, total, edges, _, _ in iter_stargazer_pages([repo], token, cutoff, batch):
+                            store.add(repo, edges)
+                        stop = cutoff
+                    store.mark_synced(repo, total, stop)
+                    times[repo] = store.times(repo, cutoff)
+                    if export and stops[repo] > cutoff:  # window stars synced by earlier runs, not refetched
+                        cached = [e for e in store.events(repo, cutoff) if e[0] < stops[repo]]
+                        for i in range(0, len(cached), 100):
+                            chunk = cached[i : i + 100]
+                            n_users += export.write(repo, chunk, lookup(u for _, u in chunk))
+                else:
+                    times[repo] = np.sort(np.concatenate(pages[repo]))
+                pages[repo] = None
+                cursors.pop(repo, None)
+                done_repos.append(repo)
+                n = int(
+                    np.count_nonzero(times[repo] < np.datetime64(now.replace(tzinfo=None), "s"))
+                )  # same window as tables
+                s1 = f"{n} stars"
+                s2 = f"({n / days:.1f}/day)"
+                tqdm.write(f"{repo:40s}{s1:12s}{s2:12s}{total:,} total")
+                pbar.update()
+            else:
+                cursors[repo] = cursor
+            checkpoint()
+        pbar.close()
+
+        tables = star_velocity(times, int(np.ceil(days)), now)
+        print(tables["summary"].round(2).to_string())
+        if report:
+            files = write_report(tables, report)
+            print(f"Velocity report saved to {', '.join(str(f) for f in files)}")
 
-    print(f"Done in {time.time() - t:.1f}s")
-    if save:
-        x = pd.DataFrame(users, columns=["Repo", "Name", "Company", "Email", "Location", "GitHub", "Followers", "Date"])
-        x.to_csv("users.csv")
-        print(f"{len(x)} users saved to users.csv")
+        print(f"Done in {time.time() - t:.1f}s, {LIMITER.report()}, tokens: {token.report()}")
+        if export:
+            export.close()
+            print(f"{export.rows} users saved to {output} ({n_users} this run)")
 
 
-def parse_opt():
+def parse_opt(argv=None):
     """Parses command-line options and returns the arguments.
 
     Args:
-        None
+        argv (list[str] | None): Arguments to parse, defaults to sys.argv.
 
     Returns:
         argparse.Namespace: Parsed command-line arguments including:
             - token (str): GitHub Personal Access Token.
             - days (int): Trailing days to analyze.
             - save (bool): Flag to save user information.
+            - batch (int): Repositories per GraphQL request.
+            - cache (str): Stargazer cache path.
+            - ttl (float): User profile cache lifetime in days.
+            - report (str): Velocity report path.
+            - output (str): Saved user info path.
+            - resume (bool): Flag to resume an interrupted save.
+            - history (int): Stargazer pages to sample for star history estimation, 0 to count stars instead.
 
     Examples:
         >>> args = parse_opt()
         >>> run(token=args.token, days=args.days, save=args.save)
     """
     parser = argparse.ArgumentParser()
-    parser.add_argument("--token", type=str, default=GITHUB_TOKEN, help="GitHub Personal Access Token")
+    parser.add_argument(
+        "--token", type=str, default=GITHUB_TOKEN, help="GitHub Personal Access Token(s), comma-separated"
+    )
     parser.add_argument("--days", type=int, default=30, help="Trailing days to analyze")
     parser.add_argument("--save", action="store_true", help="Save user info to CSV")
-    return parser.parse_args()
+    parser.add_argument("--batch", type=int, default=10, help="Repositories per GraphQL request")
+    parser.add_argument("--cache", type=str, default=str(CACHE_DIR / "stars.db"), help="Stargazer cache, '' to disable")
+    parser.add_argument("--ttl", type=float, default=30, help="User profile cache lifetime in days")
+    parser.add_argument("--report", type=str, default="", help="Velocity report path (.csv or .parquet)")
+    parser.add_argument("--output", type=str, default="users.csv", help="Saved user info CSV path")
+    parser.add_argument("--resume", action="store_true", help="Resume an interrupted --save from its checkpoint")
+    parser.add_argument("--history", type=int, default=0, help="Estimate full star history from N sampled pages")
+    return parser.parse_args(argv)
 
 
 def main(opt):
@@ -193,6 +736,13 @@ def main(opt):
         token (str): GitHub personal access token to authenticate API requests.
         days (int): Number of trailing days to analyze for star counts. Defaults to 30.
         save (bool): Flag to save user information of those who starred the repositories. Defaults to False.
+        batch (int): Number of repositories fetched per GraphQL request. Defaults to 10.
+        cache (str): Path of the SQLite stargazer cache, empty to disable. Defaults to 'cache/stars.db'.
+        ttl (float): User profile cache lifetime in days. Defaults to 30.
+        report (str): Velocity report path, '.csv' or '.parquet'. Defaults to '' (no report).
+        output (str): Saved user info CSV path. Defaults to 'users.csv'.
+        resume (bool): Resume an interrupted save from its checkpoint. Defaults to False.
+        history (int): If set, estimate full star histories from this many sampled pages per repo instead.
 
     Returns:
         None
@@ -201,7 +751,12 @@ def main(opt):
         To count stars over the last 30 days and save user info:
         $ python path/to/script.py --token YOUR_GITHUB_TOKEN --days 30 --save
     """
-    run(**vars(opt))
+    opt = vars(opt)
+    samples = opt.pop("history")
+    if samples:
+        run_history(TokenPool(opt["token"].split(",")), samples)
+    else:
+        run(**opt)
 
 
 if __name__ == "__main__":
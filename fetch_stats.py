@@ -2,70 +2,106 @@
 
 from __future__ import annotations
 
+import argparse
+import math
 import os
 import sys
+import threading
 import time
+from datetime import datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
 
 import requests
 
+from history import HISTORY_DB, HistoryStore
 from utils import (
+    LIMITER,
+    RequestMetrics,
+    StackSampler,
+    TokenPool,
+    add_request_hook,
+    days_since,
     get_timestamp,
+    http_get,
+    is_valid,
     post_json,
     read_json,
     retry_request,
     safe_merge,
+    thread_pool,
+    time_budget,
     write_json,
 )
 
+REPO_FIELDS = (
+    "name stargazerCount forkCount issues { totalCount } pullRequests { totalCount } isArchived isDisabled isLocked "
+    "isMirror pushedAt updatedAt"
+)
 
-def fetch_github_repos(org: str, token: str) -> list[dict]:
-    """Fetch all public non-archived repos for org via GraphQL."""
-    query = """
-    query($org: String!, $cursor: String) {
-      organization(login: $org) {
-        repositories(first: 100, after: $cursor, isFork: false, privacy: PUBLIC) {
-          pageInfo { hasNextPage endCursor }
-          nodes { name stargazerCount forkCount issues { totalCount } pullRequests { totalCount } isArchived isDisabled isLocked isMirror }
-        }
-      }
-    }
+
+def iter_github_repos(orgs: list[str], token: str | TokenPool, batch: int = 10):
+    """Yield (org, repos) pages of public non-archived repos, packing up to `batch` orgs into one aliased GraphQL query.
+
+    Pages are yielded as they arrive, so per-repo work can start while later pages load. An org that does not exist
+    or is inaccessible yields (org, None) once and is dropped.
     """
-    headers = {"Authorization": f"Bearer {token}"}
-    cursor, repos = None, []
-    while True:
-        data = post_json(
-            "https://api.github.com/graphql", headers, {"query": query, "variables": {"org": org, "cursor": cursor}}
-        )
-        if "errors" in data:
-            sys.exit(f"GraphQL errors: {data['errors']}")
-
-        # Safely navigate nested response structure
-        org_data = data.get("data", {}).get("organization")
-        if not org_data:
-            sys.exit(f"Organization '{org}' not found or inaccessible")
-        repo_block = org_data.get("repositories", {})
-        nodes = repo_block.get("nodes") or []
-
-        # Filter out archived/disabled/locked/mirror repos
-        for n in nodes:
-            if n and not (n.get("isArchived") or n.get("isDisabled") or n.get("isLocked") or n.get("isMirror")):
-                repos.append(n)
-
-        page_info = repo_block.get("pageInfo", {})
-        if not page_info.get("hasNextPage"):
-            break
-        cursor = page_info.get("endCursor")
-        time.sleep(0.3)
+    cursors, pending = {}, list(dict.fromkeys(orgs))
+    while pending:
+        chunk = pending[:batch]
+        blocks = [
+            f"o{i}: organization(login: $o{i}) {{ repositories(first: 100, after: $c{i}, isFork: false, "
+            f"privacy: PUBLIC) {{ pageInfo {{ hasNextPage endCursor }} nodes {{ {REPO_FIELDS} }} }} }}"
+            for i in range(len(chunk))
+        ]
+        args = ", ".join(f"$o{i}: String!, $c{i}: String" for i in range(len(chunk)))
+        query = f"query({args}) {{ rateLimit {{ cost remaining resetAt }} {' '.join(blocks)} }}"
+        variables = {}
+        for i, org in enumerate(chunk):
+            variables.update({f"o{i}": org, f"c{i}": cursors.get(org)})
+        data = post_json("https://api.github.com/graphql", {}, {"query": query, "variables": variables}, token=token)
+        if not data.get("data"):
+            raise RuntimeError(f"GraphQL errors: {data.get('errors')}")
+
+        for i, org in enumerate(chunk):
+            block = data["data"].get(f"o{i}")
+            if not block:
+                print(f"Warning: Organization '{org}' not found or inaccessible")
+                pending.remove(org)
+                yield org, None
+                continue
+            repo_block = block.get("repositories") or {}
+            # Filter out archived/disabled/locked/mirror repos
+            nodes = [
+                n
+                for n in repo_block.get("nodes") or []
+                if n and not (n.get("isArchived") or n.get("isDisabled") or n.get("isLocked") or n.get("isMirror"))
+            ]
+            page_info = repo_block.get("pageInfo") or {}
+            if page_info.get("hasNextPage"):
+                cursors[org] = page_info.get("endCursor")
+            else:
+                pending.remove(org)
+            yield org, nodes
+
+
+def fetch_github_repos(org: str, token: str | TokenPool) -> list[dict]:
+    """Fetch all public non-archived repos for org via GraphQL."""
+    repos = []
+    for _, nodes in iter_github_repos([org], token):
+        if nodes is None:
+            raise RuntimeError(f"Organization '{org}' not found or inaccessible")
+        repos.extend(nodes)
     return repos
 
 
-def fetch_github_contributors(org: str, repo: str, token: str) -> int:
+def fetch_github_contributors(org: str, repo: str, token: str | TokenPool) -> int:
     """Fetch contributor count for a repo using Link header pagination with retry."""
-    headers = {"Authorization": f"Bearer {token}", "Accept": "application/vnd.github+json"}
+    headers = {"Accept": "application/vnd.github+json"}
     url = f"https://api.github.com/repos/{org}/{repo}/contributors"
+    params = {"per_page": 1, "anon": "true"}
     try:
-        r = retry_request(requests.get, url, headers=headers, params={"per_page": 1, "anon": "true"}, timeout=60)
+        r = retry_request(http_get, url, headers=headers, params=params, timeout=60, token=token)
         if r.status_code != 200:
             print(f"Warning: Failed to fetch contributors for {repo}: HTTP {r.status_code}")
             return 0
@@ -81,35 +117,22 @@ def fetch_github_contributors(org: str, repo: str, token: str) -> int:
         return 0
 
 
-def fetch_github_stats(org: str, token: str, output: Path) -> dict:
-    """Fetch GitHub org stats, merge with existing data, and write to JSON."""
-    existing = read_json(output)
+def github_org_stats(org: str, repos: list[dict], existing: dict, full: bool) -> dict:
+    """Build one org's github.json payload from repo records, merging per-repo fields with its `existing` payload."""
     old_repos = {r["name"]: r for r in existing.get("repos", [])}
-
-    repos = fetch_github_repos(org, token)
     repo_data = []
-    for r in sorted(repos, key=lambda x: -x["stargazerCount"]):
-        contributors = fetch_github_contributors(org, r["name"], token)
-        new_repo = {
-            "name": r["name"],
-            "stars": r["stargazerCount"],
-            "forks": r["forkCount"],
-            "issues": r["issues"]["totalCount"],
-            "pull_requests": r["pullRequests"]["totalCount"],
-            "contributors": contributors,
-        }
-        old_repo = old_repos.get(r["name"], {})
-        safe_merge(new_repo, old_repo, ("stars", "forks", "contributors"), r["name"], allow_zero=False)
-        safe_merge(new_repo, old_repo, ("issues", "pull_requests"), r["name"])
+    for new_repo in sorted(repos, key=lambda x: -x["stars"]):
+        old_repo = old_repos.get(new_repo["name"], {})
+        safe_merge(new_repo, old_repo, ("stars", "forks", "contributors"), new_repo["name"], allow_zero=False)
+        safe_merge(new_repo, old_repo, ("issues", "pull_requests"), new_repo["name"])
         repo_data.append(new_repo)
-        time.sleep(0.1)
 
     # If API returned no repos, keep existing repos
     if not repo_data and existing.get("repos"):
-        print("Warning: GitHub API returned no repos, keeping existing data")
+        print(f"Warning: GitHub API returned no repos for {org}, keeping existing data")
         repo_data = existing["repos"]
 
-    data = {
+    return {
         "org": org,
         "total_stars": sum(r["stars"] for r in repo_data),
         "total_forks": sum(r["forks"] for r in repo_data),
@@ -118,40 +141,151 @@ def fetch_github_stats(org: str, token: str, output: Path) -> dict:
         "total_contributors": sum(r["contributors"] for r in repo_data),
         "public_repos": len(repo_data),
         "timestamp": get_timestamp(),
+        "full_refresh": get_timestamp() if full else existing.get("full_refresh"),
         "repos": repo_data,
     }
+
+
+def fetch_github_stats(
+    orgs: str | list[str], token: str | TokenPool, output: Path, workers: int = 8, refresh_days: float = 7
+) -> dict:
+    """Fetch GitHub org stats, merge with existing data, and write to JSON.
+
+    Repos stream in page by page from `iter_github_repos`, several orgs per GraphQL round trip, and each repo's
+    contributor count is queued on a pool of `workers` threads (1 = serial) as soon as its page arrives; output repos
+    are sorted by stars. Repos whose `pushedAt` is unchanged since the last run carry their previous contributor count
+    forward, except on a full refresh every `refresh_days` days (0 = always refresh); a failed lookup keeps the previous
+    `pushed_at`, so the next run retries it. `token` may be a `TokenPool` to spread requests over several tokens.
+
+    A single org is written to `output`. Several orgs are each written to '<stem>_<org>.json' beside it, and `output`
+    holds their combined rollup with 'org/name' repo names; an org that cannot be fetched keeps its existing file.
+    """
+    orgs = [orgs] if isinstance(orgs, str) else list(dict.fromkeys(orgs))
+    outputs = {org: output if len(orgs) == 1 else output.with_name(f"{output.stem}_{org}.json") for org in orgs}
+    existing = {org: read_json(path) for org, path in outputs.items()}
+    old_repos = {org: {r["name"]: r for r in data.get("repos", [])} for org, data in existing.items()}
+    full = {org: days_since(data.get("full_refresh")) >= refresh_days for org, data in existing.items()}
+
+    def contributors(org: str, r: dict) -> int:
+        """Return the contributor count for repo node `r`, reusing the previous count if nothing was pushed."""
+        old = old_repos[org].get(r["name"], {})
+        unchanged = not full[org] and r.get("pushedAt") and old.get("pushed_at") == r["pushedAt"]
+        if unchanged and is_valid(old.get("contributors"), allow_zero=False):
+            return old["contributors"]
+        return fetch_github_contributors(org, r["name"], token)
+
+    repos, missing = {org: [] for org in orgs}, set()
+    with thread_pool(workers) as pool:
+        for org, nodes in iter_github_repos(orgs, token):
+            if nodes is None:
+                missing.add(org)
+                continue
+            for r in nodes:  # keep only output fields, so raw pages are freed as they are processed
+                repo = {
+                    "name": r["name"],
+                    "stars": r["stargazerCount"],
+                    "forks": r["forkCount"],
+                    "issues": r["issues"]["totalCount"],
+                    "pull_requests": r["pullRequests"]["totalCount"],
+                    "contributors": pool.submit(contributors, org, r),
+                    "pushed_at": r.get("pushedAt"),
+                    "updated_at": r.get("updatedAt"),
+                }
+                repos[org].append(repo)
+        for org, org_repos in repos.items():
+            for repo in org_repos:
+                repo["contributors"] = repo["contributors"].result()
+                if not repo["contributors"]:  # failed lookup, keep the old push time so the next run retries
+                    repo["pushed_at"] = old_repos[org].get(repo["name"], {}).get("pushed_at")
+
+    if len(missing) == len(orgs):
+        raise RuntimeError(f"No accessible organizations in {', '.join(orgs)}")
+    results = {}
+    for org in orgs:
+        if org in missing:
+            results[org] = existing[org]
+            continue
+        results[org] = github_org_stats(org, repos[org], existing[org], full[org])
+        write_json(outputs[org], results[org])
+    if len(orgs) == 1:
+        return results[orgs[0]]
+
+    totals = ("total_stars", "total_forks", "total_issues", "total_pull_requests", "total_contributors")
+    data = {
+        "org": ",".join(orgs),
+        **{k: sum(results[org].get(k, 0) for org in orgs) for k in totals},
+        "public_repos": sum(results[org].get("public_repos", 0) for org in orgs),
+        "timestamp": get_timestamp(),
+        "orgs": [{k: v for k, v in results[org].items() if k != "repos"} for org in orgs if results[org]],
+        "repos": sorted(
+            ({**r, "name": f"{org}/{r['name']}"} for org in orgs for r in results[org].get("repos", [])),
+            key=lambda x: -x["stars"],
+        ),
+    }
     write_json(output, data)
     return data
 
 
-def fetch_platform_stats(api_url: str, api_key: str, output: Path) -> dict:
-    """Fetch Ultralytics Platform stats from portal API, merge with existing data, and write to JSON."""
+PLATFORM_START = "2026-01-13"  # 1 day before platform launch
+PLATFORM_FIELDS = {
+    "total_projects": "projects",
+    "total_datasets": "datasets",
+    "total_images": "images",
+    "total_models": "models",
+    "total_exports": "exports",
+    "total_annotations": "totalAnnotations",
+}
+
+
+def fetch_platform_window(api_url: str, api_key: str, start: str, end: str) -> dict:
+    """Fetch Platform totals created between ISO dates `start` and `end` inclusive, raising on HTTP errors."""
+    r = retry_request(
+        http_get,
+        f"{api_url.rstrip('/')}/api/analytics/platform-metrics/mongodb",
+        headers={"Authorization": f"Bearer {api_key}"},
+        params={"start": start, "end": end, "summary": "true"},
+        timeout=60,
+    )
+    if r.status_code != 200:
+        raise requests.HTTPError(f"Platform API returned HTTP {r.status_code}: {r.text[:200]}", response=r)
+    data = r.json()
+    return {k: data.get(field, 0) or 0 for k, field in PLATFORM_FIELDS.items()}
+
+
+def fetch_platform_stats(
+    api_url: str, api_key: str, output: Path, partials: Path | None = None, refresh_days: float = 7
+) -> dict:
+    """Fetch Ultralytics Platform stats from portal API, merge with existing data, and write to JSON.
+
+    Without `partials` the full range since launch is queried. With a `partials` file, totals of closed days are kept
+    there as windows and each run only asks for the days closed since the last run plus today, so request cost stays
+    at two windows however long the platform has been live. Every `refresh_days` days (0 = always) the closed range
+    is refetched in one window to pick up late corrections.
+    """
     existing = read_json(output)
+    today = get_timestamp()[:10]
+    yesterday = (datetime.fromisoformat(today) - timedelta(days=1)).date().isoformat()
 
     try:
-        headers = {"Authorization": f"Bearer {api_key}"}
-        # Stats from Jan 13, 2026 (1 day before platform launch), with deep dive for annotations
-        r = retry_request(
-            requests.get,
-            f"{api_url.rstrip('/')}/api/analytics/platform-metrics/mongodb",
-            headers=headers,
-            params={"start": "2026-01-13", "end": get_timestamp()[:10], "summary": "true"},
-            timeout=60,
-        )
-        if r.status_code != 200:
-            print(f"Warning: Platform API returned HTTP {r.status_code}: {r.text[:200]}")
-            return existing if existing else {}
-
-        data = r.json()
-        result = {
-            "total_projects": data.get("projects", 0),
-            "total_datasets": data.get("datasets", 0),
-            "total_images": data.get("images", 0),
-            "total_models": data.get("models", 0),
-            "total_exports": data.get("exports", 0),
-            "total_annotations": data.get("totalAnnotations", 0),
-            "timestamp": get_timestamp(),
-        }
+        if partials is None:
+            totals = fetch_platform_window(api_url, api_key, PLATFORM_START, today)
+        else:
+            state = read_json(partials)
+            windows = state.get("windows") or []
+            if days_since(state.get("reconciled")) >= refresh_days or not windows:
+                windows = [{"start": PLATFORM_START, "end": yesterday}]  # full reconciliation of all closed days
+                windows[0].update(fetch_platform_window(api_url, api_key, PLATFORM_START, yesterday))
+                state["reconciled"] = get_timestamp()
+            elif windows[-1]["end"] < yesterday:
+                start = (datetime.fromisoformat(windows[-1]["end"]) + timedelta(days=1)).date().isoformat()
+                windows.append(
+                    {"start": start, "end": yesterday, **fetch_platform_window(api_url, api_key, start, yesterday)}
+                )
+            current = fetch_platform_window(api_url, api_key, today, today)
+            totals = {k: sum(w.get(k, 0) for w in windows) + current[k] for k in PLATFORM_FIELDS}
+            write_json(partials, {**state, "windows": windows})
+
+        result = {**totals, "timestamp": get_timestamp()}
         safe_merge(result, existing, [k for k in result if k != "timestamp"], "platform", allow_zero=False)
         write_json(output, result)
         return result
@@ -161,13 +295,11 @@ def fetch_platform_stats(api_url: str, api_key: str, output: Path) -> dict:
         return existing if existing else {}
 
 
-def fetch_pypi_package_stats(package: str, pepy_api_key: str | None = None) -> dict:
-    """Fetch PyPI download statistics from pypistats.org (recent) and pepy.tech (total)."""
-    stats = {"package": package, "last_day": 0, "last_week": 0, "last_month": 0, "total": 0}
-
-    # Recent stats from pypistats.org (with retry)
+def fetch_pypistats_recent(package: str) -> dict:
+    """Fetch last day/week/month downloads for a package from pypistats.org, zeros on failure."""
+    stats = {"last_day": 0, "last_week": 0, "last_month": 0}
     try:
-        r = retry_request(requests.get, f"https://pypistats.org/api/packages/{package}/recent", timeout=30)
+        r = retry_request(http_get, f"https://pypistats.org/api/packages/{package}/recent", timeout=30)
         if r.status_code == 200:
             data = r.json().get("data", {})
             stats["last_day"] = data.get("last_day", 0) or 0
@@ -175,64 +307,140 @@ def fetch_pypi_package_stats(package: str, pepy_api_key: str | None = None) -> d
             stats["last_month"] = data.get("last_month", 0) or 0
     except Exception as e:
         print(f"Warning: Failed to fetch recent stats for {package}: {e}")
+    return stats
 
-    # All-time total from pepy.tech (with retry)
+
+def fetch_pepy_total(package: str, pepy_api_key: str | None = None) -> int:
+    """Fetch all-time downloads for a package from pepy.tech, 0 on failure."""
     try:
         headers = {"X-API-Key": pepy_api_key} if pepy_api_key else {}
-        r = retry_request(requests.get, f"https://api.pepy.tech/api/v2/projects/{package}", headers=headers, timeout=30)
+        r = retry_request(http_get, f"https://api.pepy.tech/api/v2/projects/{package}", headers=headers, timeout=30)
         if r.status_code == 200:
-            data = r.json()
-            stats["total"] = data.get("total_downloads", 0) or 0
+            return r.json().get("total_downloads", 0) or 0
     except Exception as e:
         print(f"Warning: Failed to fetch total stats for {package}: {e}")
+    return 0
 
-    time.sleep(1.0)  # Rate limiting: 10 calls/min for free pepy.tech
-    return stats
 
+def fetch_pypi_package_stats(package: str, pepy_api_key: str | None = None) -> dict:
+    """Fetch PyPI download statistics from pypistats.org (recent) and pepy.tech (total)."""
+    recent = fetch_pypistats_recent(package)
+    return {"package": package, **recent, "total": fetch_pepy_total(package, pepy_api_key)}
 
-def fetch_google_analytics_stats(property_id: str, credentials_json: str, output: Path) -> dict | None:
-    """Fetch Google Analytics stats, merge with existing data, and write to JSON."""
+
+GA_METRICS = ("activeUsers", "sessions", "eventCount", "averageSessionDuration")
+GA_PERIODS = ((1, "1d"), (7, "7d"), (30, "30d"), (90, "90d"), (365, "365d"))
+
+
+@lru_cache(maxsize=4)
+def get_ga_client(credentials_json: str):
+    """Return a BetaAnalyticsDataClient for service account `credentials_json`, cached for the process lifetime."""
     import json
 
-    existing = read_json(output)
+    from google.analytics.data_v1beta import BetaAnalyticsDataClient
+    from google.oauth2 import service_account
 
-    try:
-        from google.analytics.data_v1beta import BetaAnalyticsDataClient
-        from google.analytics.data_v1beta.types import (
-            DateRange,
-            Metric,
-            RunReportRequest,
-        )
-        from google.oauth2 import service_account
+    credentials = service_account.Credentials.from_service_account_info(json.loads(credentials_json))
+    return BetaAnalyticsDataClient(credentials=credentials)
 
-        credentials_info = json.loads(credentials_json)
-        credentials = service_account.Credentials.from_service_account_info(credentials_info)
-        client = BetaAnalyticsDataClient(credentials=credentials)
 
-        metrics = [
-            Metric(name="activeUsers"),
-            Metric(name="sessions"),
-            Metric(name="eventCount"),
-            Metric(name="averageSessionDuration"),
-        ]
+def fetch_google_analytics_daily(property_id: str, credentials_json: str, days: int = 365):
+    """Fetch one row per day of GA metrics for the trailing `days` days as a date-indexed pandas DataFrame."""
+    import pandas as pd
+    from google.analytics.data_v1beta.types import DateRange, Dimension, Metric, RunReportRequest
+
+    request = RunReportRequest(
+        property=f"properties/{property_id}",
+        date_ranges=[DateRange(start_date=f"{days}daysAgo", end_date="today")],
+        dimensions=[Dimension(name="date")],
+        metrics=[Metric(name=m) for m in GA_METRICS],
+        limit=days + 1,
+    )
+    response = get_ga_client(credentials_json).run_report(request)
+    df = pd.DataFrame(
+        [[float(v.value) for v in row.metric_values] for row in response.rows],
+        index=pd.to_datetime([row.dimension_values[0].value for row in response.rows], format="%Y%m%d"),
+        columns=["active_users", "sessions", "events", "avg_session_duration"],
+    )
+    end = pd.Timestamp.now().normalize()
+    return df.reindex(pd.date_range(end - pd.Timedelta(days=days), end), fill_value=0.0)  # zero-traffic days
+
+
+def ga_rolling_periods(daily, periods=GA_PERIODS) -> dict:
+    """Compute GA period totals locally from a daily DataFrame for any trailing windows.
+
+    Each (days, suffix) window spans `days` days ago through today like the GA `NdaysAgo` range. Sessions and events are
+    summed and session duration is session-weighted. Active users are not included: summing them over days counts
+    returning users once per day, so they must come from a deduplicated report such as `fetch_google_analytics_batch`.
+    """
+    values = daily[["sessions", "events"]].to_numpy()[::-1]  # newest first
+    durations = daily["avg_session_duration"].to_numpy()[::-1] * values[:, 0]
+    sums, weighted = values.cumsum(0), durations.cumsum()
+    result = {}
+    for days, suffix in periods:
+        i = min(days, len(values) - 1)
+        sessions, events = sums[i]
+        result[suffix] = {
+            "sessions": int(sessions),
+            "events": int(events),
+            "avg_session_duration": float(weighted[i] / sessions) if sessions else 0.0,
+        }
+    return result
 
-        data = {"property_id": property_id, "timestamp": get_timestamp(), "periods": {}}
 
-        for days, suffix in [(1, "1d"), (7, "7d"), (30, "30d"), (90, "90d"), (365, "365d")]:
-            request = RunReportRequest(
-                property=f"properties/{property_id}",
+def fetch_google_analytics_batch(
+    property_id: str, credentials_json: str, metrics=GA_METRICS, periods=GA_PERIODS
+) -> dict[str, list[float]]:
+    """Fetch `metrics` for every trailing period in one `batch_run_reports` call as {suffix: values}, 0 if no rows."""
+    from google.analytics.data_v1beta.types import BatchRunReportsRequest, DateRange, Metric, RunReportRequest
+
+    request = BatchRunReportsRequest(
+        property=f"properties/{property_id}",
+        requests=[
+            RunReportRequest(
                 date_ranges=[DateRange(start_date=f"{days}daysAgo", end_date="today")],
-                metrics=metrics,
+                metrics=[Metric(name=m) for m in metrics],
             )
-            response = client.run_report(request)
-            row = response.rows[0] if response.rows else None
+            for days, _ in periods
+        ],
+    )
+    response = get_ga_client(credentials_json).batch_run_reports(request)
+    return {
+        suffix: [float(v.value) for v in report.rows[0].metric_values] if report.rows else [0.0] * len(metrics)
+        for (_, suffix), report in zip(periods, response.reports)
+    }
 
-            data["periods"][suffix] = {
-                "active_users": int(row.metric_values[0].value) if row else 0,
-                "sessions": int(row.metric_values[1].value) if row else 0,
-                "events": int(row.metric_values[2].value) if row else 0,
-                "avg_session_duration": float(row.metric_values[3].value) if row else 0.0,
-            }
+
+def fetch_google_analytics_stats(
+    property_id: str, credentials_json: str, output: Path, daily: bool = False
+) -> dict | None:
+    """Fetch Google Analytics stats, merge with existing data, and write to JSON.
+
+    All periods are fetched in one `batch_run_reports` call. With `daily`, sessions, events and durations come from a
+    single per-day report computed locally by `ga_rolling_periods`, and only the deduplicated active users are fetched
+    in the batch call, so `active_users` means the same in both modes.
+    """
+    existing = read_json(output)
+
+    try:
+        data = {"property_id": property_id, "timestamp": get_timestamp(), "periods": {}}
+
+        if daily:
+            periods = ga_rolling_periods(
+                fetch_google_analytics_daily(property_id, credentials_json, max(d for d, _ in GA_PERIODS))
+            )
+            users = fetch_google_analytics_batch(property_id, credentials_json, ("activeUsers",))
+            for suffix, period in periods.items():
+                data["periods"][suffix] = {"active_users": int(users[suffix][0]), **period}
+        else:
+            for suffix, values in fetch_google_analytics_batch(property_id, credentials_json).items():
+                users, sessions, events, duration = values
+                data["periods"][suffix] = {
+                    "active_users": int(users),
+                    "sessions": int(sessions),
+                    "events": int(events),
+                    "avg_session_duration": duration,
+                }
 
         old_periods = existing.get("periods", {})
         for suffix, period in data["periods"].items():
@@ -273,9 +481,7 @@ def fetch_reddit_stats(subreddit: str, output: Path) -> dict:
 
     try:
         # Use shields.io JSON endpoint with retry - they have special Reddit API access
-        r = retry_request(
-            requests.get, f"https://img.shields.io/reddit/subreddit-subscribers/{subreddit}.json", timeout=30
-        )
+        r = retry_request(http_get, f"https://img.shields.io/reddit/subreddit-subscribers/{subreddit}.json", timeout=30)
         if r.status_code == 200:
             data = r.json()
             subscribers = parse_abbreviated_number(data.get("value", "0"))
@@ -288,14 +494,22 @@ def fetch_reddit_stats(subreddit: str, output: Path) -> dict:
     return result
 
 
-def fetch_pypi_stats(packages: list[str], output: Path, pepy_api_key: str | None = None) -> dict:
-    """Fetch PyPI stats, merge with existing data per-package, and write to JSON."""
+def fetch_pypi_stats(packages: list[str], output: Path, pepy_api_key: str | None = None, workers: int = 8) -> dict:
+    """Fetch PyPI stats, merge with existing data per-package, and write to JSON.
+
+    pypistats.org and pepy.tech are queried concurrently for all packages on `workers` threads, each host paced by its
+    own rate-limit bucket so pypistats calls never queue behind pepy's budget.
+    """
     existing = read_json(output)
     old_packages = {p["package"]: p for p in existing.get("packages", [])}
 
+    with thread_pool(workers) as pool:
+        recent = [pool.submit(fetch_pypistats_recent, pkg) for pkg in packages]
+        totals = [pool.submit(fetch_pepy_total, pkg, pepy_api_key) for pkg in packages]
+
     stats = []
-    for pkg in packages:
-        new_pkg = fetch_pypi_package_stats(pkg, pepy_api_key)
+    for pkg, r, t in zip(packages, recent, totals):
+        new_pkg = {"package": pkg, **r.result(), "total": t.result()}
         old_pkg = old_packages.get(pkg, {})
         safe_merge(new_pkg, old_pkg, ("total",), pkg, allow_zero=False)
         # If all recent stats are 0, likely API failure — keep existing values
@@ -316,78 +530,155 @@ def fetch_pypi_stats(packages: list[str], output: Path, pepy_api_key: str | None
     return data
 
 
-if __name__ == "__main__":
-    BASE_DIR = Path(__file__).parent
-
-    # GitHub stats
-    org = os.getenv("ORG", "ultralytics")
-    token = os.getenv("GITHUB_TOKEN")
-    if not token:
-        sys.exit("Set GITHUB_TOKEN in env")
-    github_output = BASE_DIR / "data/github.json"
-    github_data = fetch_github_stats(org, token, github_output)
+BASE_DIR = Path(__file__).parent
+PYPI_PACKAGES = [
+    "ultralytics",
+    "ultralytics-actions",
+    "ultralytics-thop",
+    "hub-sdk",
+    "mkdocs-ultralytics-plugin",
+    "ultralytics-autoimport",
+]
+GA_PROPERTY_ID = "371754141"
+
+
+def github_tokens() -> TokenPool:
+    """Return a pool of the GITHUB_TOKEN and comma-separated GITHUB_TOKENS env tokens."""
+    return TokenPool([os.getenv("GITHUB_TOKEN", ""), *os.getenv("GITHUB_TOKENS", "").split(",")])
+
+
+def run_github() -> dict:
+    """Collect GitHub stats for the ORG env organizations (comma-separated) into data/github.json."""
+    orgs = [org.strip() for org in os.getenv("ORG", "ultralytics").split(",") if org.strip()]
+    workers = int(os.getenv("GITHUB_WORKERS", "8"))
+    refresh_days = float(os.getenv("GITHUB_FULL_REFRESH_DAYS", "7"))
+    data = fetch_github_stats(orgs, github_tokens(), BASE_DIR / "data/github.json", workers, refresh_days)
     print(
-        f"✅ GitHub: {len(github_data['repos'])} repos, {github_data['total_stars']:,} stars, {github_data['total_forks']:,} forks, {github_data['total_issues']:,} issues, {github_data['total_pull_requests']:,} PRs, {github_data['total_contributors']:,} contributors"
+        f"✅ GitHub: {len(data['repos'])} repos, {data['total_stars']:,} stars, {data['total_forks']:,} forks, {data['total_issues']:,} issues, {data['total_pull_requests']:,} PRs, {data['total_contributors']:,} contributors"
     )
+    return data
 
-    # PyPI stats
-    pypi_packages = [
-        "ultralytics",
-        "ultralytics-actions",
-        "ultralytics-thop",
-        "hub-sdk",
-        "mkdocs-ultralytics-plugin",
-        "ultralytics-autoimport",
-    ]
-    pypi_output = BASE_DIR / "data/pypi.json"
-    pepy_api_key = os.getenv("PEPY_API_KEY")
-    pypi_data = fetch_pypi_stats(pypi_packages, pypi_output, pepy_api_key)
+
+def run_pypi() -> dict:
+    """Collect PyPI download stats for PYPI_PACKAGES into data/pypi.json."""
+    data = fetch_pypi_stats(PYPI_PACKAGES, BASE_DIR / "data/pypi.json", os.getenv("PEPY_API_KEY"))
     print(
-        f"✅ PyPI: {len(pypi_data['packages'])} packages, {pypi_data['total_downloads']:,} total downloads, {pypi_data['total_last_month']:,} downloads (30d)"
+        f"✅ PyPI: {len(data['packages'])} packages, {data['total_downloads']:,} total downloads, {data['total_last_month']:,} downloads (30d)"
     )
+    return data
 
-    # Google Analytics stats
-    ga_property_id = "371754141"
-    ga_credentials_json = os.getenv("GA_CREDENTIALS_JSON")
-    ga_data = None
-    if ga_credentials_json:
-        ga_output = BASE_DIR / "data/google_analytics.json"
-        ga_data = fetch_google_analytics_stats(ga_property_id, ga_credentials_json, ga_output)
-        if ga_data:
-            day = ga_data["periods"]["1d"]
-            print(
-                f"✅ GA: {day['active_users']:,} users, {day['sessions']:,} sessions, {day['events']:,} events (1d/7d/30d/90d/365d)"
-            )
 
-    # Reddit stats
-    reddit_output = BASE_DIR / "data/reddit.json"
-    reddit_data = fetch_reddit_stats("ultralytics", reddit_output)
-    print(f"✅ Reddit: {reddit_data['subscribers']:,} subscribers")
-
-    # Platform stats
-    platform_api_key = os.getenv("PORTAL_API_KEY", "")
-    platform_data = {}
-    if platform_api_key:
-        platform_output = BASE_DIR / "data/platform.json"
-        platform_data = fetch_platform_stats("https://portal.ultralytics.com", platform_api_key, platform_output)
-        if platform_data:
-            print(
-                f"✅ Platform: {platform_data.get('total_datasets', 0):,} datasets, {platform_data.get('total_annotations', 0):,} annotations, {platform_data.get('total_images', 0):,} images, {platform_data.get('total_projects', 0):,} projects, {platform_data.get('total_models', 0):,} models"
-            )
-    else:
+def run_google_analytics() -> dict | None:
+    """Collect Google Analytics stats into data/google_analytics.json if GA_CREDENTIALS_JSON is set."""
+    credentials_json = os.getenv("GA_CREDENTIALS_JSON")
+    if not credentials_json:
+        print("⚠️ GA: Skipped (GA_CREDENTIALS_JSON not set)")
+        return None
+    daily = os.getenv("GA_DAILY", "") == "1"
+    data = fetch_google_analytics_stats(
+        GA_PROPERTY_ID, credentials_json, BASE_DIR / "data/google_analytics.json", daily
+    )
+    if data:
+        day = data["periods"]["1d"]
+        print(
+            f"✅ GA: {day['active_users']:,} users, {day['sessions']:,} sessions, {day['events']:,} events (1d/7d/30d/90d/365d)"
+        )
+    return data
+
+
+def run_reddit() -> dict:
+    """Collect r/ultralytics subscriber count into data/reddit.json."""
+    data = fetch_reddit_stats("ultralytics", BASE_DIR / "data/reddit.json")
+    print(f"✅ Reddit: {data['subscribers']:,} subscribers")
+    return data
+
+
+def run_platform() -> dict:
+    """Collect Ultralytics Platform stats into data/platform.json if PORTAL_API_KEY is set."""
+    api_key = os.getenv("PORTAL_API_KEY", "")
+    if not api_key:
         print("⚠️ Platform: Skipped (PORTAL_API_KEY not set)")
+        return {}
+    api_url = os.getenv("PORTAL_API_URL", "https://portal.ultralytics.com")
+    refresh_days = float(os.getenv("PLATFORM_FULL_REFRESH_DAYS", "7"))
+    partials = BASE_DIR / "data/platform_partials.json"
+    data = fetch_platform_stats(api_url, api_key, BASE_DIR / "data/platform.json", partials, refresh_days)
+    if data:
+        print(
+            f"✅ Platform: {data.get('total_datasets', 0):,} datasets, {data.get('total_annotations', 0):,} annotations, {data.get('total_images', 0):,} images, {data.get('total_projects', 0):,} projects, {data.get('total_models', 0):,} models"
+        )
+    return data
+
+
+# Source name -> (collector, output file, default timeout in seconds)
+SOURCES = {
+    "github": (run_github, "data/github.json", 1200),
+    "pypi": (run_pypi, "data/pypi.json", 300),
+    "google_analytics": (run_google_analytics, "data/google_analytics.json", 300),
+    "reddit": (run_reddit, "data/reddit.json", 120),
+    "platform": (run_platform, "data/platform.json", 300),
+}
+
+
+def run_sources(
+    names: list[str], timeout: float | None = None, timings: dict | None = None, deadline: float | None = None
+) -> dict:
+    """Run the named sources concurrently, each bounded by its own timeout (or `timeout` for all).
+
+    A source that fails or exceeds its timeout falls back to its existing JSON output. Sources not in `names` are read
+    from their existing outputs, so the returned dict always covers every source. `deadline` caps every source's
+    timeout so the whole run ends within it. Each source's requests are held to a budget slightly below its timeout,
+    after which they fail fast and the source merges its previous values in time. If given, `timings` is filled with
+    {name: {"seconds", "status"}} for each source run, status being 'ok', 'failed' or 'timeout'.
+    """
+    results, threads = {}, {}
+    timings = {} if timings is None else timings
+    budgets = {name: min(timeout or SOURCES[name][2], deadline or math.inf) for name in names}
+
+    def worker(name: str) -> None:
+        """Run one source within its budget and store its result, leaving failures to the fallback below."""
+        t, budget = time.time(), budgets[name]
+        try:
+            with time_budget(budget - min(10.0, 0.1 * budget)):  # leave time to merge and write the results
+                results[name] = SOURCES[name][0]()
+            timings[name] = {"seconds": round(time.time() - t, 3), "status": "ok"}
+        except BaseException as e:  # includes SystemExit raised by sys.exit() inside fetchers
+            timings[name] = {"seconds": round(time.time() - t, 3), "status": "failed"}
+            print(f"Warning: {name} source failed: {e}")
+
+    start = time.time()
+    for name in names:
+        threads[name] = threading.Thread(target=worker, args=(name,), name=name, daemon=True)
+        threads[name].start()
+    for name, thread in threads.items():
+        thread.join(max(0.0, start + budgets[name] - time.time()))
+        if thread.is_alive():
+            timings[name] = {"seconds": round(time.time() - start, 3), "status": "timeout"}
+            print(f"Warning: {name} source timed out after {budgets[name]:.0f}s, keeping existing data")
+
+    for name, (_, output, _) in SOURCES.items():
+        if threads.get(name) is None or threads[name].is_alive() or name not in results:
+            results[name] = read_json(BASE_DIR / output)
+    return results
+
+
+def write_summary(results: dict) -> dict:
+    """Build data/summary.json from source results with field-level merge from the existing summary."""
+    github_data, pypi_data = results.get("github") or {}, results.get("pypi") or {}
+    ga_data, reddit_data = results.get("google_analytics") or {}, results.get("reddit") or {}
+    platform_data = results.get("platform") or {}
+    ga_events = ga_data.get("periods", {}).get("90d", {}).get("events", 0)
 
-    # Create summary with field-level merge from existing
     existing_summary = read_json(BASE_DIR / "data/summary.json")
     summary = {
-        "total_stars": github_data["total_stars"],
-        "total_forks": github_data["total_forks"],
-        "total_issues": github_data["total_issues"],
-        "total_pull_requests": github_data["total_pull_requests"],
-        "total_downloads": pypi_data["total_downloads"],
-        "events_per_day": round(float(ga_data["periods"]["90d"]["events"]) / 90.0) if ga_data else 0,  # 90-day mean
-        "total_contributors": github_data["total_contributors"],
-        "reddit_subscribers": reddit_data["subscribers"],
+        "total_stars": github_data.get("total_stars", 0),
+        "total_forks": github_data.get("total_forks", 0),
+        "total_issues": github_data.get("total_issues", 0),
+        "total_pull_requests": github_data.get("total_pull_requests", 0),
+        "total_downloads": pypi_data.get("total_downloads", 0),
+        "events_per_day": round(float(ga_events) / 90.0),  # 90-day mean
+        "total_contributors": github_data.get("total_contributors", 0),
+        "reddit_subscribers": reddit_data.get("subscribers", 0),
         "platform_datasets": platform_data.get("total_datasets", 0),
         "platform_annotations": platform_data.get("total_annotations", 0),
         "platform_images": platform_data.get("total_images", 0),
@@ -397,8 +688,53 @@ if __name__ == "__main__":
         "timestamp": get_timestamp(),
     }
     safe_merge(summary, existing_summary, [k for k in summary if k != "timestamp"], "summary", allow_zero=False)
-    summary_output = BASE_DIR / "data/summary.json"
-    write_json(summary_output, summary)
+    write_json(BASE_DIR / "data/summary.json", summary)
     print(
         f"✅ Summary: {summary['total_stars']:,} stars, {summary['total_forks']:,} forks, {summary['total_issues']:,} issues, {summary['total_pull_requests']:,} PRs, {summary['total_downloads']:,} downloads, {summary['events_per_day']:,} events/day, {summary['total_contributors']:,} contributors, {summary['reddit_subscribers']:,} reddit"
     )
+    return summary
+
+
+def parse_opt(argv: list[str] | None = None):
+    """Parse command-line options for selecting sources and timeouts from `argv` (default: sys.argv)."""
+    parser = argparse.ArgumentParser(description="Fetch Ultralytics analytics and update data/*.json")
+    parser.add_argument("--sources", nargs="+", choices=list(SOURCES), default=list(SOURCES), help="Sources to run")
+    parser.add_argument(
+        "--timeout", type=float, default=None, help="Per-source timeout in seconds (default: per source)"
+    )
+    parser.add_argument("--deadline", type=float, default=None, help="Total run time limit in seconds")
+    parser.add_argument("--no-summary", action="store_true", help="Do not rebuild data/summary.json")
+    parser.add_argument("--history", type=str, default=str(HISTORY_DB), help="Metrics history database, '' to disable")
+    parser.add_argument(
+        "--metrics", type=str, default=str(BASE_DIR / "data/metrics.json"), help="Request metrics (.json or .prom)"
+    )
+    parser.add_argument("--profile", type=str, default="", help="Write a sampling profile of all threads (collapsed)")
+    return parser.parse_args(argv)
+
+
+def main(opt) -> dict:
+    """Run the selected sources, then rebuild the summary and append history, metrics and profile outputs."""
+    if "github" in opt.sources and not github_tokens():
+        sys.exit("Set GITHUB_TOKEN or GITHUB_TOKENS in env")
+    t = time.time()
+    metrics = add_request_hook(RequestMetrics()) if opt.metrics else None
+    sampler = StackSampler().start() if opt.profile else None
+    timings = {}
+    results = run_sources(opt.sources, opt.timeout, timings, opt.deadline)
+    if not opt.no_summary:
+        results["summary"] = write_summary(results)
+    if opt.history:
+        history = HistoryStore(opt.history)
+        rows = sum(history.append(name, data) for name, data in results.items() if data)
+        print(f"✅ History: {rows:,} new rows in {opt.history}")
+    if metrics:
+        data = metrics.write(opt.metrics, timestamp=get_timestamp(), wall_s=round(time.time() - t, 3), sources=timings)
+        print(f"✅ Metrics: {data['requests']:,} requests, {data.get('bytes', 0):,} bytes, saved to {opt.metrics}")
+    if sampler:
+        print(f"✅ Profile: {sampler.stop(opt.profile):,} samples saved to {opt.profile}")
+    print(f"✅ Done in {time.time() - t:.1f}s, {LIMITER.report()}")
+    return results
+
+
+if __name__ == "__main__":
+    main(parse_opt())
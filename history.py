@@ -0,0 +1,101 @@
+# Ultralytics 🚀 AGPL-3.0 License - https://ultralytics.com/license
+"""
+Append-only time-series store of collected analytics metrics.
+
+Every `fetch_stats.py` run appends one row per (source, entity, metric) to a SQLite table indexed for range queries,
+so growth and trend charts are a single indexed read instead of a walk through the git log.
+
+Usage:
+    >>> from history import HistoryStore
+    >>> HistoryStore().query("github", "stars", "ultralytics", start="2026-01-01")
+"""
+
+from __future__ import annotations
+
+import math
+import sqlite3
+from pathlib import Path
+
+HISTORY_DB = Path(__file__).parent / "cache/history.db"  # not committed, rebuild with backfill.py
+
+# List fields holding per-entity records, and the key naming each entity
+ENTITY_LISTS = {"repos": "name", "packages": "package", "orgs": "org"}
+
+
+def _is_number(value) -> bool:
+    """Check if a value is a finite int or float (not bool)."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def flatten(source: str, data: dict) -> list[tuple[str, str, float]]:
+    """Flatten a data/*.json payload into (entity, metric, value) rows.
+
+    Top-level numbers belong to the entity `source`, records in 'repos'/'packages' lists to their name, and nested
+    dicts such as GA 'periods' to their key (e.g. '30d').
+    """
+    rows = []
+    for key, value in (data or {}).items():
+        if _is_number(value):
+            rows.append((source, key, float(value)))
+        elif key in ENTITY_LISTS and isinstance(value, list):
+            name_key = ENTITY_LISTS[key]
+            for item in value:
+                if isinstance(item, dict) and item.get(name_key):
+                    rows.extend((item[name_key], k, float(v)) for k, v in item.items() if _is_number(v))
+        elif isinstance(value, dict):
+            for entity, metrics in value.items():
+                if isinstance(metrics, dict):
+                    rows.extend((entity, k, float(v)) for k, v in metrics.items() if _is_number(v))
+    return rows
+
+
+class HistoryStore:
+    """Append-only SQLite store of metric values keyed by source, entity, metric and run timestamp."""
+
+    def __init__(self, path: Path | str = HISTORY_DB):
+        """Open or create the history database at `path`."""
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS metrics (
+                source TEXT, entity TEXT, metric TEXT, timestamp TEXT, date TEXT, value REAL,
+                PRIMARY KEY (source, entity, metric, timestamp));
+            CREATE INDEX IF NOT EXISTS metrics_series ON metrics (source, entity, metric, date);
+            """
+        )
+
+    def append(self, source: str, data: dict, timestamp: str | None = None) -> int:
+        """Append all metrics of one source payload and return the number of new rows.
+
+        Rows are keyed by the payload 'timestamp', so re-appending unchanged fallback data adds nothing.
+        """
+        timestamp = timestamp or (data or {}).get("timestamp")
+        if not timestamp:
+            return 0
+        return self.extend([(source, e, m, timestamp, timestamp[:10], v) for e, m, v in flatten(source, data)])
+
+    def extend(self, rows) -> int:
+        """Append (source, entity, metric, timestamp, date, value) rows, skipping existing keys; return rows added."""
+        before = self.db.total_changes
+        self.db.executemany("INSERT OR IGNORE INTO metrics VALUES (?, ?, ?, ?, ?, ?)", rows)
+        self.db.commit()
+        return self.db.total_changes - before
+
+    def query(
+        self, source: str, metric: str, entity: str | None = None, start: str | None = None, end: str | None = None
+    ) -> list[tuple[str, float]]:
+        """Return (timestamp, value) points for one metric of an entity between ISO dates `start` and `end` inclusive.
+
+        The entity defaults to `source` itself, which holds top-level totals such as 'total_stars'.
+        """
+        rows = self.db.execute(
+            """
+            SELECT timestamp, value FROM metrics
+            WHERE source = ? AND entity = ? AND metric = ? AND date >= ? AND date <= ?
+            ORDER BY timestamp
+            """,
+            (source, entity or source, metric, start or "", end or "9999"),
+        )
+        return rows.fetchall()
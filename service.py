@@ -0,0 +1,214 @@
+# Ultralytics 🚀 AGPL-3.0 License - https://ultralytics.com/license
+"""
+Long-running metrics service serving the latest output of every source over local HTTP.
+
+Each source's JSON is held in memory pre-serialized with an ETag, so reads take milliseconds and `If-None-Match`
+revalidations answer 304. Sources refresh in the background on their own intervals, one refresh per source at a time,
+so upstream APIs see the same bounded request rate however many clients poll. The previous value keeps being served
+while a refresh runs or after it fails (stale-while-revalidate), and fetchers still merge field by field with their
+previous outputs through `safe_merge`.
+
+Usage:
+    $ python service.py --port 8000
+    $ curl http://127.0.0.1:8000/summary.json
+    $ curl http://127.0.0.1:8000/                 # per-source refresh status
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from fetch_stats import BASE_DIR, SOURCES, write_summary
+from history import HISTORY_DB, HistoryStore
+from utils import get_timestamp, read_json, time_budget
+
+# Default refresh interval per source in seconds
+REFRESH_INTERVALS = {"github": 3600, "pypi": 3600, "google_analytics": 3600, "reddit": 1800, "platform": 900}
+
+
+class MetricsService:
+    """In-memory store of the latest source outputs with background refreshes on per-source intervals.
+
+    Entries start from the existing data/*.json files, so the service can answer immediately, and every selected
+    source is refreshed once at startup and then every `intervals[name]` seconds. A failed or empty refresh keeps the
+    previous entry. After each successful refresh the summary is rebuilt and, if `history` is set, appended there.
+    """
+
+    def __init__(self, sources=None, intervals: dict | None = None, timeout: float | None = None, history: str = ""):
+        """Load existing outputs for all sources and schedule the selected `sources` (default: all) for refresh."""
+        self.sources = list(SOURCES if sources is None else sources)
+        self.intervals = {**REFRESH_INTERVALS, **(intervals or {})}
+        self.timeout = timeout
+        self.history = HistoryStore(history) if history else None
+        self.lock = threading.Lock()
+        self.summary_lock = threading.Lock()
+        self.entries = {}  # name -> {"data", "body", "etag", "updated"}
+        self.status = {
+            name: {"refreshing": False, "error": None, "refreshed": None, "next": 0.0} for name in self.sources
+        }
+        for name, (_, output, _) in SOURCES.items():
+            self._set(name, read_json(BASE_DIR / output))
+        self._set("summary", read_json(BASE_DIR / "data/summary.json"))
+
+    def _set(self, name: str, data: dict | None) -> None:
+        """Store `data` for `name` with its serialized body and ETag."""
+        body = json.dumps(data or {}, indent=2).encode()
+        entry = {
+            "data": data or {},
+            "body": body,
+            "etag": f'"{hashlib.sha1(body).hexdigest()}"',
+            "updated": time.time(),
+        }
+        with self.lock:
+            self.entries[name] = entry
+
+    def get(self, name: str) -> dict | None:
+        """Return the current entry for `name`, or None if unknown."""
+        with self.lock:
+            return self.entries.get(name)
+
+    def refresh(self, name: str) -> None:
+        """Run source `name` within its timeout budget, keeping the previous entry if it fails or returns nothing."""
+        fn, _, default_timeout = SOURCES[name]
+        status = self.status[name]
+        try:
+            with time_budget(self.timeout or default_timeout):
+                data = fn()
+            if data:
+                self._set(name, data)
+                self._rebuild_summary(name, data)
+            status.update(error=None, refreshed=get_timestamp())
+        except BaseException as e:  # includes SystemExit raised by sys.exit() inside fetchers
+            status["error"] = str(e) or type(e).__name__
+            print(f"Warning: {name} refresh failed, serving previous data: {status['error']}")
+        finally:
+            status.update(refreshing=False, next=time.time() + self.intervals.get(name, 3600))
+
+    def _rebuild_summary(self, name: str, data: dict) -> None:
+        """Rebuild data/summary.json from the current entries and append the refreshed source to history."""
+        with self.summary_lock:
+            summary = write_summary({n: (self.get(n) or {}).get("data") for n in SOURCES})
+            self._set("summary", summary)
+            if self.history:
+                self.history.append(name, data)
+                self.history.append("summary", summary)
+
+    def schedule(self, stop: threading.Event, tick: float = 1.0) -> None:
+        """Start due refreshes on background threads until `stop` is set, never overlapping a source with itself."""
+        while not stop.is_set():
+            now = time.time()
+            for name in self.sources:
+                status = self.status[name]
+                if not status["refreshing"] and now >= status["next"]:
+                    status["refreshing"] = True
+                    threading.Thread(target=self.refresh, args=(name,), name=name, daemon=True).start()
+            stop.wait(tick)
+
+    def index(self) -> dict:
+        """Return the refresh status of every source with the age of its served data."""
+        now = time.time()
+        return {
+            "sources": {
+                name: {
+                    **{k: v for k, v in self.status.get(name, {}).items() if k != "next"},
+                    "age_s": round(now - entry["updated"], 1),
+                    "next_refresh_s": round(max(0.0, self.status[name]["next"] - now), 1)
+                    if name in self.status
+                    else None,
+                }
+                for name, entry in self.entries.items()
+            },
+            "timestamp": get_timestamp(),
+        }
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """Serve '/<source>.json' entries with ETag revalidation and '/' with the refresh status."""
+
+    server: ServiceServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        """Silence per-request logging."""
+
+    def do_HEAD(self):
+        """Serve headers only."""
+        self.do_GET(body=False)
+
+    def do_GET(self, body: bool = True):
+        """Serve an entry, a 304 if the client's ETag is current, or the status index."""
+        name = urlsplit(self.path).path.strip("/").removesuffix(".json")
+        if name in ("", "index"):
+            return self.send(200, json.dumps(self.server.service.index(), indent=2).encode(), {}, body)
+        entry = self.server.service.get(name)
+        if entry is None:
+            return self.send(404, b'{"error": "unknown source"}', {}, body)
+        headers = {"ETag": entry["etag"], "Cache-Control": f"max-age=60, stale-while-revalidate={self.server.swr}"}
+        if entry["etag"] in {x.strip() for x in (self.headers.get("If-None-Match") or "").split(",")}:
+            return self.send(304, b"", headers, False)
+        self.send(200, entry["body"], headers, body)
+
+    def send(self, status: int, content: bytes, headers: dict, body: bool = True) -> None:
+        """Send a JSON response with `headers`, omitting the body for HEAD and 304 responses."""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content) if body else 0))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.end_headers()
+        if body:
+            self.wfile.write(content)
+
+
+class ServiceServer(ThreadingHTTPServer):
+    """Threading HTTP server bound to a MetricsService."""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], service: MetricsService):
+        """Bind to `address` and serve `service`, advertising the longest refresh interval as stale-while-revalidate."""
+        super().__init__(address, ServiceHandler)
+        self.service = service
+        self.swr = max(service.intervals.get(name, 3600) for name in service.sources) if service.sources else 3600
+
+
+def parse_opt(argv: list[str] | None = None):
+    """Parse command-line options for the metrics service from `argv` (default: sys.argv)."""
+    parser = argparse.ArgumentParser(description="Serve analytics from memory with background refreshes")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Address to bind")
+    parser.add_argument("--port", type=int, default=8000, help="Port to bind")
+    parser.add_argument("--sources", nargs="+", choices=list(SOURCES), default=list(SOURCES), help="Sources to refresh")
+    parser.add_argument(
+        "--interval", nargs="+", default=[], metavar="SOURCE=SECONDS", help="Override refresh intervals"
+    )
+    parser.add_argument("--timeout", type=float, default=None, help="Per-refresh time budget (default: per source)")
+    parser.add_argument("--history", type=str, default=str(HISTORY_DB), help="Metrics history database, '' to disable")
+    return parser.parse_args(argv)
+
+
+def main(opt) -> None:
+    """Run the service until interrupted."""
+    intervals = {k: float(v) for k, v in (x.split("=", 1) for x in opt.interval)}
+    service = MetricsService(opt.sources, intervals, opt.timeout, opt.history)
+    server = ServiceServer((opt.host, opt.port), service)
+    stop = threading.Event()
+    threading.Thread(target=service.schedule, args=(stop,), name="scheduler", daemon=True).start()
+    print(f"✅ Serving {', '.join(service.entries)} on http://{opt.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main(parse_opt())
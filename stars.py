@@ -0,0 +1,56 @@
+# Ultralytics 🚀 AGPL-3.0 License - https://ultralytics.com/license
+"""
+Unified command-line entry point for the analytics fetchers and star tools.
+
+Each subcommand imports its module only when run, so `--help`, dispatch and single-source runs never load pandas,
+numpy or the Google Analytics client unless the code path needs them.
+
+Usage:
+    $ python stars.py fetch                          # all sources, same as fetch_stats.py
+    $ python stars.py fetch github pypi --timeout 600
+    $ python stars.py count-stars --days 30 --save
+    $ python stars.py backfill --csv history.csv
+    $ python stars.py benchmark --baseline bench.json
+    $ python stars.py serve --port 8000
+    $ python stars.py webhook --port 8001
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import sys
+
+# Subcommand -> (module, help); each module provides parse_opt(argv) and main(opt)
+COMMANDS = {
+    "fetch": ("fetch_stats", "Fetch analytics sources into data/*.json, e.g. 'fetch github pypi'"),
+    "count-stars": ("count_stars", "Count recent stars, export stargazers or estimate star histories"),
+    "backfill": ("backfill", "Backfill the metrics history from committed data/*.json versions"),
+    "benchmark": ("benchmark", "Benchmark all fetchers against a local replay server"),
+    "serve": ("service", "Serve the latest analytics over HTTP with background refreshes"),
+    "webhook": ("webhook", "Count stars and forks from GitHub webhook deliveries"),
+}
+EXIT_CODE_COMMANDS = {"benchmark"}  # commands whose main() returns a process exit code
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Parse the subcommand from `argv`, import its module and run it with the remaining arguments."""
+    parser = argparse.ArgumentParser(prog="stars", description="Ultralytics analytics and star tracking")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="command")
+    for name, (_, help) in COMMANDS.items():
+        commands.add_parser(name, help=help, add_help=False)  # the module's own parser handles -h and options
+    args, rest = parser.parse_known_args(argv)
+
+    if args.command == "fetch":  # leading positional source names, e.g. 'fetch github pypi'
+        names = 0
+        while names < len(rest) and not rest[names].startswith("-"):
+            names += 1
+        rest = ["--sources", *rest[:names], *rest[names:]] if names else rest
+
+    module = importlib.import_module(COMMANDS[args.command][0])
+    code = module.main(module.parse_opt(rest))
+    return code if args.command in EXIT_CODE_COMMANDS else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
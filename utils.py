@@ -2,73 +2,708 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
 import math
+import os
+import random
 import sys
+import threading
 import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
 from pathlib import Path
+from urllib.parse import urlsplit
 
 import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+
+@lru_cache(maxsize=1)
+def get_session() -> requests.Session:
+    """Return the process-wide HTTP session with keep-alive connection pools per host and gzip negotiation."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)  # 16 hosts, up to 32 concurrent connections each
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = "gzip, deflate"
+    return session
+
+
+class RateLimiter:
+    """Per-host token-bucket scheduler that paces requests to the budget each server reports.
+
+    Hosts that send `X-RateLimit-Remaining`/`X-RateLimit-Reset` (or GraphQL `rateLimit` fields) may spend their whole
+    remaining budget at full speed and then wait for the reset. Hosts without headers refill at a static `rates` entry
+    (requests/s, bursting up to `burst`), or are not paced at all. `Retry-After` blocks a host for the given time.
+    """
+
+    def __init__(self, rates: dict | None = None, burst: float = 10):
+        """Initialize with optional static {host: requests_per_second} rates and bucket capacity `burst`."""
+        self.rates = dict(rates or {})
+        self.burst = burst
+        self.buckets = {}  # host -> {"tokens", "updated", "reset", "blocked", "in_flight"}
+        self.throttled = defaultdict(float)  # host -> seconds spent waiting
+        self.lock = threading.Lock()
+
+    def _bucket(self, host: str) -> dict:
+        """Return the bucket for `host`, creating a full one if needed."""
+        if host not in self.buckets:
+            self.buckets[host] = {
+                "tokens": self.burst,
+                "updated": time.time(),
+                "reset": None,
+                "blocked": 0.0,
+                "in_flight": 0,
+            }
+        return self.buckets[host]
+
+    def wait(self, host: str, max_wait: float = math.inf) -> float:
+        """Reserve one request for `host`, sleeping until it is allowed, and return the seconds waited.
+
+        Raises `DeadlineExceeded` without reserving if the wait would be longer than `max_wait` seconds.
+        """
+        with self.lock:
+            b, now = self._bucket(host), time.time()
+            rate = self.rates.get(host)
+            if b["reset"] is not None:  # server-reported budget, restored in full at reset time
+                if now >= b["reset"]:
+                    b["tokens"], b["reset"] = self.burst, None
+                delay = max(0.0, b["reset"] - now) if b["tokens"] < 1 and b["reset"] else 0.0
+            elif rate:  # static token bucket
+                b["tokens"] = min(self.burst, b["tokens"] + (now - b["updated"]) * rate)
+                delay = max(0.0, (1 - b["tokens"]) / rate)
+            else:
+                delay = 0.0
+            delay = max(delay, b["blocked"] - now)
+            if delay > max_wait:
+                raise DeadlineExceeded(f"{host} throttled for {delay:.0f}s, past the deadline")
+            b["tokens"] -= 1
+            b["in_flight"] += 1
+            b["updated"] = now
+            if delay > 0:
+                self.throttled[host] += delay
+        if delay > 0:
+            time.sleep(delay)
+        return max(delay, 0.0)
+
+    def release(self, host: str) -> None:
+        """Drop the reservation of a request to `host` that got no response."""
+        with self.lock:
+            b = self._bucket(host)
+            b["in_flight"] = max(0, b["in_flight"] - 1)
+
+    def update(self, host: str, response) -> None:
+        """Complete a reservation for `host` and update its budget from rate-limit and Retry-After response headers.
+
+        The reported remaining budget does not yet count requests still in flight, so those are subtracted from it.
+        """
+        headers = response.headers
+        with self.lock:
+            b = self._bucket(host)
+            b["in_flight"] = max(0, b["in_flight"] - 1)
+            remaining, reset = headers.get("X-RateLimit-Remaining"), headers.get("X-RateLimit-Reset")
+            if remaining is not None and reset is not None:
+                try:
+                    remaining, reset = float(remaining) - b["in_flight"], float(reset)
+                    if reset == b["reset"]:  # same window: responses may arrive out of order, keep the lowest
+                        remaining = min(remaining, b["tokens"])
+                    b["tokens"], b["reset"] = remaining, reset
+                except ValueError:
+                    pass
+            retry_after = headers.get("Retry-After")
+            if retry_after:
+                try:
+                    until = time.time() + float(retry_after)
+                except ValueError:
+                    try:
+                        until = parsedate_to_datetime(retry_after).timestamp()
+                    except (TypeError, ValueError):
+                        until = 0.0
+                b["blocked"] = max(b["blocked"], until)
+
+    def update_graphql(self, host: str, rate_limit: dict | None) -> None:
+        """Update the budget for `host` from a GraphQL `rateLimit { cost remaining resetAt }` block."""
+        if not rate_limit or rate_limit.get("remaining") is None or not rate_limit.get("resetAt"):
+            return
+        reset = datetime.fromisoformat(rate_limit["resetAt"].replace("Z", "+00:00")).timestamp()
+        with self.lock:
+            b = self._bucket(host)
+            b["tokens"], b["reset"] = float(rate_limit["remaining"]) - b["in_flight"], reset
+
+    def report(self) -> str:
+        """Return a one-line summary of time spent throttled per host."""
+        total = sum(self.throttled.values())
+        hosts = ", ".join(f"{h} {t:.1f}s" for h, t in sorted(self.throttled.items(), key=lambda x: -x[1]) if t > 0)
+        return f"Throttled {total:.1f}s" + (f" ({hosts})" if hosts else "")
+
+
+# Static budgets for hosts that do not send rate-limit headers (requests per second)
+LIMITER = RateLimiter({"api.pepy.tech": 10 / 60})  # pepy.tech free tier: 10 calls/min
+
+
+class DeadlineExceeded(requests.RequestException):
+    """Raised instead of sending a request, or waiting for one, once the thread's deadline has passed."""
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of sending a request to a host whose circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Per-host circuit breaker failing requests fast after `threshold` consecutive failures.
+
+    Connection errors, timeouts and 5xx responses count as failures and any other response resets the count, while 429
+    rate-limit replies are left to the rate limiter, so one exhausted token cannot shut off a host. An open breaker
+    rejects requests with `CircuitOpenError` for `cooldown` seconds, then lets one trial request through (half-open)
+    and closes again if it succeeds, so fetchers fall back to their previous values instead of spending their whole
+    retry budget on a host that is down.
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 60):
+        """Initialize with the consecutive failures that open a breaker and the seconds it stays open."""
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = defaultdict(int)  # host -> consecutive failures
+        self.until = {}  # host -> time when an open breaker admits its next trial request
+        self.lock = threading.Lock()
+
+    def check(self, host: str) -> None:
+        """Raise `CircuitOpenError` if `host` is open, else admit the request (one trial per cooldown if half-open)."""
+        with self.lock:
+            until = self.until.get(host)
+            if until is None:
+                return
+            if time.time() < until:
+                raise CircuitOpenError(f"Circuit open for {host} after {self.failures[host]} consecutive failures")
+            self.until[host] = time.time() + self.cooldown  # half-open: this request is the trial
+
+    def record(self, host: str, ok: bool) -> None:
+        """Record a request outcome for `host`, opening its breaker at `threshold` consecutive failures."""
+        with self.lock:
+            if ok:
+                self.failures.pop(host, None)
+                self.until.pop(host, None)
+                return
+            self.failures[host] += 1
+            if self.failures[host] >= self.threshold:
+                if host not in self.until:
+                    print(f"Warning: {host} failed {self.threshold} times in a row, failing fast for {self.cooldown}s")
+                self.until[host] = time.time() + self.cooldown
+
+
+BREAKER = CircuitBreaker()
+
+
+def rate_limit_key(url: str, token: str = "") -> str:
+    """Return the rate-limit bucket for `url`: its host, with GitHub GraphQL kept apart from the REST budget.
+
+    Authenticated requests get one bucket per token, identified by a short hash, since each token has its own quota.
+    """
+    parts = urlsplit(url)
+    key = f"{parts.netloc}/graphql" if parts.path.endswith("/graphql") else parts.netloc
+    return f"{key}#{hashlib.sha256(token.encode()).hexdigest()[:6]}" if token else key
+
+
+class TokenPool:
+    """Pool of GitHub tokens that routes each request to the token with the most remaining quota.
+
+    Remaining quota and reset time are tracked per token from `X-RateLimit-*` response headers, unknown budgets count
+    as full. When every token is exhausted the one that resets first is used, and the rate limiter waits for its reset.
+    The pool is thread-safe, so concurrent workers can share it.
+    """
+
+    def __init__(self, tokens):
+        """Initialize the pool from an iterable of tokens, ignoring blanks and duplicates."""
+        self.tokens = [t.strip() for t in dict.fromkeys(tokens) if t and t.strip()]
+        self.remaining = dict.fromkeys(self.tokens, math.inf)
+        self.reset = dict.fromkeys(self.tokens, 0.0)
+        self.used = dict.fromkeys(self.tokens, 0)  # requests sent, spreads load while budgets are unknown
+        self.in_flight = dict.fromkeys(self.tokens, 0)  # requests sent and not yet answered
+        self.key = hashlib.sha256(",".join(sorted(self.tokens)).encode()).hexdigest()
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of tokens in the pool."""
+        return len(self.tokens)
+
+    def acquire(self) -> str:
+        """Return the token with the most headroom and reserve one request on it."""
+        with self.lock:
+            now = time.time()
+            for t in self.tokens:
+                if self.reset[t] and now >= self.reset[t]:
+                    self.remaining[t], self.reset[t] = math.inf, 0.0
+            # Tokens with quota by most remaining then least used, else the exhausted token that resets first
+            token = max(
+                self.tokens,
+                key=lambda t: (
+                    (1, self.remaining[t], -self.used[t]) if self.remaining[t] > 0 else (0, -self.reset[t], 0)
+                ),
+            )
+            self.remaining[token] -= 1
+            self.used[token] += 1
+            self.in_flight[token] += 1
+            return token
+
+    def release(self, token: str) -> None:
+        """Drop the reservation of a request on `token` that got no response."""
+        with self.lock:
+            if token in self.in_flight:
+                self.in_flight[token] = max(0, self.in_flight[token] - 1)
+
+    def update(self, token: str, response) -> None:
+        """Complete a reservation on `token` and update its budget from the rate-limit headers of its response.
+
+        Requests still in flight on `token` are subtracted from the reported remaining budget.
+        """
+        if token not in self.remaining:
+            return
+        self.release(token)
+        remaining, reset = response.headers.get("X-RateLimit-Remaining"), response.headers.get("X-RateLimit-Reset")
+        if remaining is None or reset is None:
+            return
+        with self.lock:
+            try:
+                remaining, reset = float(remaining) - self.in_flight[token], float(reset)
+            except ValueError:
+                return
+            if reset == self.reset[token]:  # same window: responses may arrive out of order, keep the lowest
+                remaining = min(remaining, self.remaining[token])
+            self.remaining[token], self.reset[token] = remaining, reset
+
+    def report(self) -> str:
+        """Return a one-line summary of known remaining quota per token."""
+        return ", ".join(
+            f"#{hashlib.sha256(t.encode()).hexdigest()[:6]} {'?' if math.isinf(r) else int(r)} left"
+            for t, r in self.remaining.items()
+        )
+
+
+class ResponseCache:
+    """Disk-backed cache of GET responses revalidated with conditional requests (ETag / If-Modified-Since).
+
+    Responses carrying an `ETag` or `Last-Modified` header are stored per URL, params and credentials. Later requests
+    send `If-None-Match`/`If-Modified-Since` and a `304 Not Modified` reply is served from disk, which costs no GitHub
+    rate-limit quota. The least recently used entries are evicted once the cache exceeds `max_bytes`.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = 50 << 20):
+        """Initialize the cache in directory `path` with a total size limit of `max_bytes`."""
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.lock = threading.Lock()
+
+    def key(self, url: str, params: dict | None = None, headers: dict | None = None, auth: str = "") -> str:
+        """Return the cache key for a request, distinguishing query params, credentials and Accept types."""
+        headers = headers or {}
+        url = requests.Request("GET", url, params=params).prepare().url
+        auth = auth or headers.get("Authorization", "")
+        raw = "\n".join((url, auth, headers.get("X-API-Key", ""), headers.get("Accept", "")))
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def validators(self, key: str) -> dict:
+        """Return conditional request headers for a cached entry, or an empty dict if there is none."""
+        meta = read_json(self.path / f"{key}.json")
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def load(self, key: str, url: str) -> requests.Response | None:
+        """Rebuild the cached 200 response for `key`, or return None if the entry is missing."""
+        meta, body = self.path / f"{key}.json", self.path / f"{key}.body"
+        try:
+            r = requests.Response()
+            r.status_code, r.url, r._content = 200, url, body.read_bytes()
+            r.headers = CaseInsensitiveDict(json.loads(meta.read_text(encoding="utf-8"))["headers"])
+            r.encoding = requests.utils.get_encoding_from_headers(r.headers)
+            os.utime(body)  # mark as recently used
+        except (OSError, ValueError, KeyError):
+            return None
+        self.hits += 1
+        return r
+
+    def store(self, key: str, response: requests.Response) -> None:
+        """Store a 200 response that carries validators, then evict old entries beyond the size limit."""
+        etag, modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        if response.status_code != 200 or not (etag or modified):
+            return
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in {"content-encoding", "content-length"}}
+        self.path.mkdir(parents=True, exist_ok=True)
+        body = self.path / f"{key}.body"
+        tmp = body.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_bytes(response.content)
+        tmp.replace(body)
+        write_json(self.path / f"{key}.json", {"etag": etag, "last_modified": modified, "headers": headers})
+        self.evict()
+
+    def evict(self) -> None:
+        """Delete least recently used entries until the cache fits in `max_bytes`."""
+        with self.lock:
+            bodies = [(p.stat().st_mtime, p.stat().st_size, p) for p in self.path.glob("*.body")]
+            total = sum(size for _, size, _ in bodies)
+            for _, size, p in sorted(bodies):
+                if total <= self.max_bytes:
+                    break
+                p.unlink(missing_ok=True)
+                p.with_suffix(".json").unlink(missing_ok=True)
+                total -= size
+
+
+# Conditional-request cache for GET responses, disabled with HTTP_CACHE_MB=0
+HTTP_CACHE_MB = float(os.getenv("HTTP_CACHE_MB", "50"))
+HTTP_CACHE = (
+    ResponseCache(Path(os.getenv("HTTP_CACHE_DIR", Path(__file__).parent / "cache/http")), int(HTTP_CACHE_MB * 2**20))
+    if HTTP_CACHE_MB > 0
+    else None
+)
+
+_deadline = threading.local()  # absolute time.time() deadline of the work on this thread
+
+
+def get_deadline() -> float:
+    """Return this thread's deadline as a time.time() value, or inf if none is set."""
+    return getattr(_deadline, "value", math.inf)
+
+
+def set_deadline(deadline: float) -> None:
+    """Set this thread's absolute deadline, used as a ThreadPoolExecutor initializer to pass deadlines to workers."""
+    _deadline.value = deadline
+
+
+@contextmanager
+def time_budget(seconds: float | None):
+    """Limit HTTP requests made on this thread inside the block to `seconds`, or to an earlier enclosing deadline.
+
+    Past the deadline, requests raise `DeadlineExceeded` instead of being sent and `retry_request` stops waiting,
+    so callers fall back to their existing values. Worker threads inherit it through `thread_pool()`.
+    """
+    previous = get_deadline()
+    set_deadline(min(previous, time.time() + seconds) if seconds is not None else previous)
+    try:
+        yield
+    finally:
+        set_deadline(previous)
+
+
+def thread_pool(workers: int) -> ThreadPoolExecutor:
+    """Return a ThreadPoolExecutor of `workers` threads (at least 1) that inherit the calling thread's deadline."""
+    return ThreadPoolExecutor(max_workers=max(1, workers), initializer=set_deadline, initargs=(get_deadline(),))
+
+
+# Callables receiving one record dict per HTTP request, see add_request_hook()
+REQUEST_HOOKS = []
+_attempt = threading.local()  # retry attempt of the request in flight on this thread
+
+
+def add_request_hook(hook):
+    """Register `hook(record)` to be called after every HTTP request and return it.
+
+    Each record holds 'method', 'host', 'endpoint' (URL path), 'status' (None on connection errors), 'seconds',
+    'bytes', 'retry' (0 for a first attempt), 'throttled' (rate-limiter wait in seconds) and 'error'. Hooks run on the
+    requesting thread and must be thread-safe; with no hooks registered requests are not instrumented at all.
+    """
+    REQUEST_HOOKS.append(hook)
+    return hook
+
+
+def remove_request_hook(hook) -> None:
+    """Unregister a hook added with `add_request_hook`."""
+    if hook in REQUEST_HOOKS:
+        REQUEST_HOOKS.remove(hook)
+
+
+def _emit_request(method, url, status, seconds, size, throttled, error=None) -> None:
+    """Build the record for one request and pass it to every hook, never letting a hook break the request."""
+    parts = urlsplit(url)
+    record = {
+        "method": method,
+        "host": parts.netloc,
+        "endpoint": parts.path or "/",
+        "status": status,
+        "seconds": seconds,
+        "bytes": size,
+        "retry": getattr(_attempt, "value", 0),
+        "throttled": throttled,
+        "error": str(error) if error else None,
+    }
+    for hook in list(REQUEST_HOOKS):
+        try:
+            hook(record)
+        except Exception as e:
+            print(f"Warning: request hook failed: {e}")
+
+
+class RequestMetrics:
+    """Request hook rolling per-request records up into per-host and per-endpoint metrics for one run."""
+
+    def __init__(self):
+        """Initialize an empty record list."""
+        self.records = []
+        self.lock = threading.Lock()
+
+    def __call__(self, record: dict) -> None:
+        """Store one request record."""
+        with self.lock:
+            self.records.append(record)
+
+    @staticmethod
+    def _rollup(records: list[dict]) -> dict:
+        """Aggregate counts, bytes, retries, throttle time and latency percentiles of `records`."""
+        latency = sorted(r["seconds"] for r in records)
+        statuses = defaultdict(int)
+        for r in records:
+            statuses[str(r["status"] or "error")] += 1
+        return {
+            "requests": len(records),
+            "errors": sum(r["status"] is None or r["status"] >= 400 for r in records),
+            "retries": sum(r["retry"] > 0 for r in records),
+            "bytes": sum(r["bytes"] for r in records),
+            "seconds": round(sum(latency), 3),
+            "throttled_s": round(sum(r["throttled"] for r in records), 3),
+            "p50_ms": round(1000 * latency[len(latency) // 2], 1),
+            "p95_ms": round(1000 * latency[min(len(latency) - 1, int(len(latency) * 0.95))], 1),
+            "max_ms": round(1000 * latency[-1], 1),
+            "status": dict(sorted(statuses.items())),
+        }
+
+    def summary(self, top: int = 20) -> dict:
+        """Return run totals, per-host rollups and the `top` endpoints by total request time."""
+        with self.lock:
+            records = list(self.records)
+        hosts, endpoints = defaultdict(list), defaultdict(list)
+        for r in records:
+            hosts[r["host"]].append(r)
+            endpoints[(r["host"], r["endpoint"])].append(r)
+        slowest = sorted(endpoints.items(), key=lambda x: -sum(r["seconds"] for r in x[1]))[:top]
+        return {
+            **(self._rollup(records) if records else {"requests": 0}),
+            "hosts": {h: self._rollup(rs) for h, rs in sorted(hosts.items())},
+            "endpoints": [{"host": h, "endpoint": e, **self._rollup(rs)} for (h, e), rs in slowest],
+        }
+
+    def write(self, path: Path | str, **extra) -> dict:
+        """Write the summary plus `extra` fields to `path`, as Prometheus text format for '.prom' paths, else JSON."""
+        data = {**extra, **self.summary()}
+        path = Path(path)
+        if path.suffix != ".prom":
+            write_json(path, data)
+            return data
+        lines = []
+        for host, m in data["hosts"].items():
+            for status, n in m["status"].items():
+                lines.append(f'stars_http_requests_total{{host="{host}",status="{status}"}} {n}')
+            lines.append(f'stars_http_request_seconds_sum{{host="{host}"}} {m["seconds"]}')
+            lines.append(f'stars_http_response_bytes_total{{host="{host}"}} {m["bytes"]}')
+            lines.append(f'stars_http_retries_total{{host="{host}"}} {m["retries"]}')
+            lines.append(f'stars_http_throttled_seconds_total{{host="{host}"}} {m["throttled_s"]}')
+        for source, m in (extra.get("sources") or {}).items():
+            lines.append(f'stars_source_seconds{{source="{source}",status="{m["status"]}"}} {m["seconds"]}')
+        if "wall_s" in extra:
+            lines.append(f"stars_run_seconds {extra['wall_s']}")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("\n".join(lines) + "\n")
+        return data
+
+
+class StackSampler:
+    """Wall-clock sampling profiler recording the stack of every thread, named by thread, every `interval` seconds.
+
+    Stacks are written in collapsed 'thread;outer;...;inner count' format, readable by speedscope and flamegraph.pl,
+    so time spent blocked on the network in worker threads shows up alongside CPU time.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        """Initialize the sampler with its sampling `interval` in seconds."""
+        self.interval = interval
+        self.counts = defaultdict(int)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self) -> None:
+        """Sample all other threads until stopped."""
+        while not self.stopped.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == self.thread.ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(f"{frame.f_code.co_name} ({Path(frame.f_code.co_filename).name}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self.counts[";".join([names.get(ident, str(ident)), *reversed(stack)])] += 1
+
+    def start(self) -> StackSampler:
+        """Start sampling in a background thread and return self."""
+        self.thread.start()
+        return self
+
+    def stop(self, path: Path | str | None = None) -> int:
+        """Stop sampling, write collapsed stacks to `path` if given, and return the number of samples taken."""
+        self.stopped.set()
+        self.thread.join()
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            Path(path).write_text("".join(f"{k} {v}\n" for k, v in sorted(self.counts.items())))
+        return sum(self.counts.values())
+
+
+# Local stand-in server, e.g. 'http://127.0.0.1:8000': requests to https://host/path are sent to {REPLAY_URL}/host/path
+REPLAY_URL = os.getenv("STARS_REPLAY_URL", "").rstrip("/")
+
+
+def replay_url(url: str) -> str:
+    """Rewrite `url` to the `REPLAY_URL` stand-in, keeping the original host as the first path segment."""
+    parts = urlsplit(url)
+    return f"{REPLAY_URL}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+
+
+def _request(method: str, url: str, token: str | TokenPool | None = None, **kwargs) -> requests.Response:
+    """Send a request through the shared session, paced by the per-host rate limiter.
+
+    `token` adds a Bearer Authorization header, drawn from the pool with the most headroom if a `TokenPool` is given.
+    GET requests are revalidated against `HTTP_CACHE` when enabled, and a 304 reply is served from disk. With
+    `REPLAY_URL` set the request goes to the local stand-in, while rate limits and caching stay keyed by the real URL.
+    Requests past the thread's deadline or to a host with an open `BREAKER` raise without being sent, and the timeout
+    is clipped to the time left before the deadline.
+    """
+    if isinstance(token, TokenPool) and not token:
+        token = None
+    cache_key = None
+    if HTTP_CACHE and method == "GET":
+        auth = token.key if isinstance(token, TokenPool) else token or ""
+        cache_key = HTTP_CACHE.key(url, kwargs.get("params"), kwargs.get("headers"), auth)
+        kwargs["headers"] = {**(kwargs.get("headers") or {}), **HTTP_CACHE.validators(cache_key)}
+
+    bearer = token.acquire() if isinstance(token, TokenPool) else token or ""
+    if bearer:
+        kwargs["headers"] = {**(kwargs.get("headers") or {}), "Authorization": f"Bearer {bearer}"}
+
+    host, key = urlsplit(url).netloc, rate_limit_key(url, bearer)
+    remaining = get_deadline() - time.time()
+    try:
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Deadline passed before {method} {url}")
+        BREAKER.check(host)
+        throttled = LIMITER.wait(key, remaining)
+    except requests.RequestException:  # never sent, give the pool reservation back
+        if isinstance(token, TokenPool):
+            token.release(bearer)
+        raise
+    if remaining < math.inf:
+        kwargs["timeout"] = min(kwargs.get("timeout") or remaining, remaining)
+
+    start = time.perf_counter()
+    try:
+        r = get_session().request(method, replay_url(url) if REPLAY_URL else url, **kwargs)
+    except requests.RequestException as e:
+        BREAKER.record(host, False)
+        LIMITER.release(key)
+        if isinstance(token, TokenPool):
+            token.release(bearer)
+        if REQUEST_HOOKS:
+            _emit_request(method, url, None, time.perf_counter() - start, 0, throttled, e)
+        raise
+    BREAKER.record(host, r.status_code < 500)
+    if REQUEST_HOOKS:
+        _emit_request(method, url, r.status_code, time.perf_counter() - start, len(r.content), throttled)
+    LIMITER.update(key, r)
+    if isinstance(token, TokenPool):
+        token.update(bearer, r)
+
+    if cache_key:
+        if r.status_code == 304:
+            return HTTP_CACHE.load(cache_key, url) or r
+        HTTP_CACHE.store(cache_key, r)
+    return r
+
+
+def http_get(url: str, **kwargs) -> requests.Response:
+    """GET `url` through the shared pooled session."""
+    return _request("GET", url, **kwargs)
+
+
+def http_post(url: str, **kwargs) -> requests.Response:
+    """POST to `url` through the shared pooled session."""
+    return _request("POST", url, **kwargs)
+
+
+def backoff_delay(attempt: int, backoff: float = 2.0, cap: float = 60.0) -> float:
+    """Return the jittered wait in seconds before retry `attempt` (0-based).
+
+    Half of `backoff * 2**attempt` (capped at `cap`) is fixed and the other half random, so concurrent clients retrying
+    the same outage do not wake in lockstep.
+    """
+    wait = min(cap, backoff * 2**attempt)
+    return wait / 2 + random.uniform(0, wait / 2)
 
 
 def retry_request(func, *args, retries: int = 3, backoff: float = 2.0, **kwargs):
-    """Retry a request function with exponential backoff on exceptions and 5xx/429 errors."""
+    """Retry a request function with jittered exponential backoff on exceptions and 5xx/429 errors.
+
+    Open circuit breakers and passed deadlines are raised at once, and no retry is attempted if its backoff would end
+    after the thread's deadline.
+    """
     last_error = None
     retries = max(1, retries)  # Ensure at least one attempt
     for attempt in range(retries):
         try:
+            _attempt.value = attempt
             response = func(*args, **kwargs)
             # Retry on server errors (5xx) and rate limits (429)
             if response.status_code >= 500 or response.status_code == 429:
                 last_error = requests.RequestException(f"HTTP {response.status_code}: {response.text[:200]}")
-                if attempt < retries - 1:
-                    wait = backoff * (2**attempt)
-                    print(f"Retry {attempt + 1}/{retries} after {wait}s: HTTP {response.status_code}")
-                    time.sleep(wait)
-                continue
-            return response
+                reason = f"HTTP {response.status_code}"
+            else:
+                return response
+        except (CircuitOpenError, DeadlineExceeded):
+            raise
         except (requests.RequestException, requests.Timeout) as e:
-            last_error = e
-            if attempt < retries - 1:
-                wait = backoff * (2**attempt)
-                print(f"Retry {attempt + 1}/{retries} after {wait}s: {e}")
-                time.sleep(wait)
+            last_error, reason = e, str(e)
+        finally:
+            _attempt.value = 0
+        if attempt < retries - 1:
+            wait = backoff_delay(attempt, backoff)
+            if time.time() + wait >= get_deadline():
+                break
+            print(f"Retry {attempt + 1}/{retries} after {wait:.1f}s: {reason}")
+            time.sleep(wait)
     raise last_error
 
 
 def fetch_json(url: str, headers: dict | None = None, timeout: int = 60) -> dict:
     """Fetch JSON from URL with error handling."""
-    r = requests.get(url, headers=headers, timeout=timeout)
+    r = http_get(url, headers=headers, timeout=timeout)
     if r.status_code != 200:
         sys.exit(f"HTTP {r.status_code}: {r.text[:200]}")
     return r.json()
 
 
-def post_json(url: str, headers: dict, payload: dict, timeout: int = 60, retries: int = 3) -> dict:
-    """POST JSON to URL with retry and error handling."""
-    last_error = None
-    for attempt in range(retries):
-        try:
-            r = requests.post(url, headers=headers, json=payload, timeout=timeout)
-            if r.status_code == 200:
-                return r.json()
-            # Retry on server errors (5xx), fail immediately on client errors (4xx)
-            if r.status_code >= 500:
-                last_error = f"HTTP {r.status_code}: {r.text[:200]}"
-                if attempt < retries - 1:
-                    wait = 2.0 * (2**attempt)
-                    print(f"Retry {attempt + 1}/{retries} after {wait}s: {last_error}")
-                    time.sleep(wait)
-                continue
-            sys.exit(f"HTTP {r.status_code}: {r.text[:200]}")
-        except (requests.RequestException, requests.Timeout) as e:
-            last_error = str(e)
-            if attempt < retries - 1:
-                wait = 2.0 * (2**attempt)
-                print(f"Retry {attempt + 1}/{retries} after {wait}s: {e}")
-                time.sleep(wait)
-    sys.exit(f"Failed after {retries} retries: {last_error}")
+def post_json(
+    url: str, headers: dict, payload: dict, timeout: int = 60, retries: int = 3, token: str | TokenPool | None = None
+) -> dict:
+    """POST JSON to URL with retry and error handling, authenticated with `token` if given.
+
+    Raises `requests.HTTPError` on a non-200 reply that is not retried (e.g. 4xx), or the last error once `retries`
+    attempts are exhausted, so callers can fall back instead of exiting.
+    """
+    r = retry_request(http_post, url, headers=headers, json=payload, timeout=timeout, token=token, retries=retries)
+    if r.status_code != 200:
+        raise requests.HTTPError(f"HTTP {r.status_code}: {r.text[:200]}", response=r)
+    data = r.json()
+    if isinstance(data, dict):
+        bearer = r.request.headers.get("Authorization", "").removeprefix("Bearer ")
+        LIMITER.update_graphql(rate_limit_key(url, bearer), (data.get("data") or {}).get("rateLimit"))
+    return data
 
 
 def read_json(path: Path) -> dict:
@@ -91,14 +726,23 @@ def _sanitize_floats(obj):
 
 
 def write_json(path: Path, data: dict) -> None:
-    """Write readable JSON with trailing newline. Sanitizes NaN/Inf to 0 if present."""
+    """Write readable JSON with trailing newline. Sanitizes NaN/Inf to 0 if present.
+
+    The file is written to a temporary sibling and then renamed over `path`, so readers and interrupted writers (e.g.
+    a timed-out source thread killed at exit) never leave a half-written file.
+    """
     path.parent.mkdir(parents=True, exist_ok=True)
     try:
         text = json.dumps(data, ensure_ascii=False, indent=2, allow_nan=False)
     except ValueError:
         print(f"Warning: Sanitizing NaN/Inf values before writing {path.name}")
         text = json.dumps(_sanitize_floats(data), ensure_ascii=False, indent=2, allow_nan=False)
-    path.write_text(text + "\n", encoding="utf-8")
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        tmp.write_text(text + "\n", encoding="utf-8")
+        tmp.replace(path)
+    finally:
+        tmp.unlink(missing_ok=True)
 
 
 def is_valid(value, allow_zero: bool = True) -> bool:
@@ -126,3 +770,13 @@ def safe_merge(new_data: dict, old_data: dict, keys: tuple | list, label: str =
 def get_timestamp() -> str:
     """Return ISO 8601 timestamp with Z suffix."""
     return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def days_since(timestamp: str | None) -> float:
+    """Return days elapsed since an ISO 8601 timestamp, or infinity if it is missing or invalid."""
+    try:
+        return (
+            datetime.now(timezone.utc) - datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+        ).total_seconds() / 86400
+    except (AttributeError, ValueError):
+        return math.inf
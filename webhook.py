@@ -0,0 +1,291 @@
+# Ultralytics 🚀 AGPL-3.0 License - https://ultralytics.com/license
+"""
+Event-driven star and fork counts from GitHub webhook deliveries.
+
+A local receiver verifies each delivery's `X-Hub-Signature-256` HMAC and applies `star`, `watch` and `fork` events as
+deltas to in-memory per-repo counts seeded from data/github.json. Star events are also recorded in the `count_stars.py`
+stargazer cache, so a star delivered as both a `watch` and a `star` event counts once. Redelivered events are skipped by
+their `X-GitHub-Delivery` id. A periodic GraphQL scan, one request per 100 repos, corrects any drift from missed
+deliveries, so the counts stay near real time with almost no API usage.
+
+Usage:
+    $ export GITHUB_WEBHOOK_SECRET=...
+    $ python webhook.py --port 8001                        # receive deliveries, GET / for the current counts
+    $ python webhook.py --send star.json fork.json         # post recorded payloads to a running receiver
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import sys
+import threading
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from count_stars import CACHE_DIR, StarCache, parse_time
+from fetch_stats import BASE_DIR, iter_github_repos
+from utils import TokenPool, get_timestamp, read_json
+
+EVENTS = {"star", "watch", "fork"}
+MAX_PAYLOAD = 25 * 1024 * 1024  # GitHub caps webhook payloads at 25 MB
+DELIVERY_MEMORY = 10000  # recent delivery ids remembered to skip redeliveries
+
+
+def sign(body: bytes, secret: str) -> str:
+    """Return the `X-Hub-Signature-256` header value for `body` signed with `secret`."""
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(body: bytes, signature: str | None, secret: str) -> bool:
+    """Check a delivery's `X-Hub-Signature-256` header against `body` in constant time.
+
+    Compared as bytes, as `hmac.compare_digest` raises TypeError on non-ASCII strings; http.server decodes headers as
+    latin-1, so any header value encodes back to its raw bytes.
+    """
+    if not signature:
+        return False
+    return hmac.compare_digest(sign(body, secret).encode(), signature.encode("latin-1", errors="replace"))
+
+
+def infer_event(payload: dict) -> str:
+    """Infer the `X-GitHub-Event` type of a recorded payload that was saved without its headers."""
+    if "forkee" in payload:
+        return "fork"
+    if "zen" in payload:
+        return "ping"
+    return "watch" if payload.get("action") == "started" else "star"
+
+
+class StarCounter:
+    """Per-repo star and fork counts keyed by 'owner/name', updated by webhook deltas and GraphQL reconciliation.
+
+    Counts are seeded from a github.json payload, either a single org or the multi-org rollup. The first event of an
+    untracked repo takes the repo's totals from the payload, which GitHub reports after the event.
+    """
+
+    def __init__(self, cache: StarCache, seed: dict | None = None):
+        """Seed counts from `seed` and record star events in `cache`."""
+        self.cache = cache
+        self.lock = threading.Lock()
+        self.repos = {}  # 'owner/name' -> {"stars", "forks"}
+        self.recent = deque(maxlen=DELIVERY_MEMORY)
+        self.seen = set()
+        self.stats = {"events": 0, "duplicates": 0, "ignored": 0, "drift": 0, "reconciled": None}
+        seed = seed or {}
+        for repo in seed.get("repos", []):
+            name = repo["name"] if "/" in repo["name"] else f"{seed.get('org')}/{repo['name']}"
+            self.repos[name] = {"stars": repo.get("stars", 0), "forks": repo.get("forks", 0)}
+
+    def apply(self, event: str, payload: dict, delivery: str | None = None) -> str:
+        """Apply one webhook event and return 'applied', 'duplicate' or 'ignored'."""
+        repo = payload.get("repository") or {}
+        name, action = repo.get("full_name"), payload.get("action")
+        if (
+            event not in EVENTS
+            or not name
+            or (event == "watch" and action != "started")
+            or (event == "star" and action not in {"created", "deleted"})
+        ):
+            with self.lock:
+                self.stats["ignored"] += 1
+            return "ignored"
+
+        with self.lock:
+            if delivery:
+                if delivery in self.seen:
+                    self.stats["duplicates"] += 1
+                    return "duplicate"
+                if len(self.recent) == self.recent.maxlen:
+                    self.seen.discard(self.recent[0])
+                self.recent.append(delivery)
+                self.seen.add(delivery)
+            self.stats["events"] += 1
+
+            changed = True
+            if event != "fork":
+                sender = payload.get("sender") or {}
+                user = {"id": sender.get("node_id") or str(sender.get("id")), "login": sender.get("login")}
+                if action == "deleted":
+                    starred_at = None
+                elif payload.get("starred_at"):
+                    starred_at = parse_time(payload["starred_at"])
+                else:  # 'watch' events carry no star time
+                    starred_at = datetime.now(timezone.utc)
+                changed = self.cache.record(name, user, starred_at) or action == "deleted"
+
+            counts = self.repos.get(name)
+            if counts is None:
+                self.repos[name] = {"stars": repo.get("stargazers_count", 0), "forks": repo.get("forks_count", 0)}
+            elif event == "fork":
+                counts["forks"] += 1
+            elif changed:
+                counts["stars"] = max(0, counts["stars"] + (-1 if action == "deleted" else 1))
+        return "applied"
+
+    def reconcile(self, orgs: list[str], token: str | TokenPool) -> int:
+        """Replace counts with GraphQL totals for every repo of `orgs` and return the absolute drift corrected."""
+        drift = 0
+        for org, nodes in iter_github_repos(orgs, token):
+            with self.lock:
+                for node in nodes or []:
+                    name = f"{org}/{node['name']}"
+                    old = self.repos.get(name, {"stars": 0, "forks": 0})
+                    new = {"stars": node.get("stargazerCount", 0), "forks": node.get("forkCount", 0)}
+                    drift += abs(new["stars"] - old["stars"]) + abs(new["forks"] - old["forks"])
+                    self.repos[name] = new
+        self.stats.update(drift=self.stats["drift"] + drift, reconciled=get_timestamp())
+        return drift
+
+    def orgs(self) -> list[str]:
+        """Return the owners of all tracked repos."""
+        with self.lock:
+            return sorted({name.split("/")[0] for name in self.repos})
+
+    def snapshot(self) -> dict:
+        """Return current totals and per-repo counts sorted by stars."""
+        with self.lock:
+            repos = [{"name": name, **counts} for name, counts in self.repos.items()]
+        repos.sort(key=lambda x: -x["stars"])
+        return {
+            "total_stars": sum(r["stars"] for r in repos),
+            "total_forks": sum(r["forks"] for r in repos),
+            **self.stats,
+            "timestamp": get_timestamp(),
+            "repos": repos,
+        }
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """Receive signed webhook deliveries on POST and serve the current counts on GET."""
+
+    server: WebhookServer
+
+    def log_message(self, format, *args):
+        """Silence per-request logging."""
+
+    def do_GET(self):
+        """Serve the current counts."""
+        self.send(200, self.server.counter.snapshot())
+
+    def do_POST(self):
+        """Verify, parse and apply one webhook delivery."""
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_PAYLOAD:
+            return self.send(413, {"error": "payload too large"})
+        body = self.rfile.read(length)
+        if not verify_signature(body, self.headers.get("X-Hub-Signature-256"), self.server.secret):
+            return self.send(401, {"error": "invalid signature"})
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return self.send(400, {"error": "invalid JSON"})
+        event = self.headers.get("X-GitHub-Event", "")
+        if event == "ping":
+            return self.send(200, {"result": "pong"})
+        result = self.server.counter.apply(event, payload, self.headers.get("X-GitHub-Delivery"))
+        self.send(200, {"result": result})
+
+    def send(self, status: int, data: dict) -> None:
+        """Send `data` as a JSON response."""
+        content = json.dumps(data, indent=2).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class WebhookServer(ThreadingHTTPServer):
+    """Threading HTTP server bound to a StarCounter and its webhook secret."""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], counter: StarCounter, secret: str):
+        """Bind to `address` and apply verified deliveries to `counter`."""
+        super().__init__(address, WebhookHandler)
+        self.counter = counter
+        self.secret = secret
+
+
+def reconcile_forever(counter: StarCounter, orgs: list[str], token: TokenPool, interval: float, stop: threading.Event):
+    """Reconcile `counter` with GraphQL at startup and then every `interval` seconds until `stop` is set."""
+    while not stop.is_set():
+        try:
+            drift = counter.reconcile(orgs or counter.orgs(), token)
+            print(f"✅ Reconciled {len(counter.repos)} repos, corrected drift {drift:,}")
+        except Exception as e:
+            print(f"Warning: reconciliation failed, keeping webhook counts: {e}")
+        stop.wait(interval)
+
+
+def send_event(url: str, path: Path, secret: str, event: str | None = None):
+    """POST the recorded payload at `path` to a receiver at `url`, signed like a GitHub delivery."""
+    import requests
+
+    body = Path(path).read_bytes()
+    headers = {
+        "Content-Type": "application/json",
+        "X-GitHub-Event": event or infer_event(json.loads(body)),
+        "X-GitHub-Delivery": str(uuid.uuid4()),
+        "X-Hub-Signature-256": sign(body, secret),
+    }
+    return requests.post(url, data=body, headers=headers, timeout=10)
+
+
+def parse_opt(argv: list[str] | None = None):
+    """Parse command-line options for the webhook receiver from `argv` (default: sys.argv)."""
+    parser = argparse.ArgumentParser(description="Count stars and forks from GitHub webhook deliveries")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Address to bind")
+    parser.add_argument("--port", type=int, default=8001, help="Port to bind")
+    parser.add_argument("--secret", type=str, default=os.getenv("GITHUB_WEBHOOK_SECRET", ""), help="Webhook secret")
+    parser.add_argument("--seed", type=str, default=str(BASE_DIR / "data/github.json"), help="Initial counts")
+    parser.add_argument("--cache", type=str, default=str(CACHE_DIR / "stars.db"), help="Stargazer cache database")
+    parser.add_argument("--orgs", nargs="+", default=[], help="Orgs to reconcile (default: owners of tracked repos)")
+    parser.add_argument(
+        "--reconcile", type=float, default=3600, help="Reconciliation interval in seconds, 0 to disable"
+    )
+    parser.add_argument("--send", nargs="+", default=[], metavar="PAYLOAD", help="Post recorded payloads and exit")
+    parser.add_argument("--event", type=str, default=None, help="Event type for --send (default: inferred)")
+    parser.add_argument("--url", type=str, default=None, help="Receiver URL for --send (default: --host/--port)")
+    return parser.parse_args(argv)
+
+
+def main(opt) -> None:
+    """Post recorded payloads with --send, or run the receiver until interrupted."""
+    if not opt.secret:
+        sys.exit("Set GITHUB_WEBHOOK_SECRET in env")
+    if opt.send:
+        url = opt.url or f"http://{opt.host}:{opt.port}/"
+        for path in opt.send:
+            r = send_event(url, path, opt.secret, opt.event)
+            print(f"{path}: {r.status_code} {r.text.strip()}")
+        return
+
+    counter = StarCounter(StarCache(opt.cache), read_json(Path(opt.seed)))
+    server = WebhookServer((opt.host, opt.port), counter, opt.secret)
+    stop = threading.Event()
+    tokens = TokenPool([os.getenv("GITHUB_TOKEN", ""), *os.getenv("GITHUB_TOKENS", "").split(",")])
+    if opt.reconcile and tokens:
+        args = (counter, opt.orgs, tokens, opt.reconcile, stop)
+        threading.Thread(target=reconcile_forever, args=args, name="reconcile", daemon=True).start()
+    elif opt.reconcile:
+        print("Warning: GITHUB_TOKEN not set, counts will not be reconciled")
+    print(f"✅ Receiving webhooks for {len(counter.repos)} repos on http://{opt.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main(parse_opt())